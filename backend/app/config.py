@@ -1,22 +1,57 @@
 # AnCapTruyenLamVideo - Configuration Settings
 
-from pydantic_settings import BaseSettings
-from typing import List
-from functools import lru_cache
+import os
+import sys
+from dataclasses import dataclass, field, fields
+from typing import Any, List
 
+from dotenv import load_dotenv
 
-class Settings(BaseSettings):
+__all__ = ["Settings", "settings", "get_settings"]
+
+# Load .env once at import; real environment variables take precedence
+load_dotenv(".env", encoding="utf-8")
+
+_TRUE_VALUES = {"1", "true", "yes", "on", "t", "y"}
+_FALSE_VALUES = {"0", "false", "no", "off", "f", "n", ""}
+
+
+def _cast(raw: str, default: Any) -> Any:
+    """Cast a raw environment string to the type of the field default."""
+    if isinstance(default, bool):
+        value = raw.strip().lower()
+        if value in _TRUE_VALUES:
+            return True
+        if value in _FALSE_VALUES:
+            return False
+        raise ValueError(f"Invalid boolean value: {raw!r}")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """
     Application settings loaded from environment variables.
+    Variable names are case-insensitive (MONGODB_URI or mongodb_uri).
     """
 
     # MongoDB Configuration
     mongodb_uri: str = "mongodb://localhost:27017"
     database_name: str = "ancaptruyenlamvideo_db"
+    mongodb_min_pool_size: int = 10  # Connections opened and kept warm at startup
+    mongodb_max_pool_size: int = 100
 
     # Server Configuration
     backend_port: int = 8000
     backend_host: str = "0.0.0.0"
+    # Event loop / HTTP parser for `python -m app.main` (uvloop is not available on Windows)
+    uvicorn_loop: str = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn_http: str = "httptools"
+    uvicorn_workers: int = 1  # Ignored when reload is on (development)
 
     # CORS Configuration
     cors_origins: str = "http://localhost:4200,http://127.0.0.1:4200"
@@ -28,6 +63,28 @@ class Settings(BaseSettings):
     deepinfra_api_key: str = ""
     deepinfra_base_url: str = "https://api.deepinfra.com/v1/openai"
     qwen_model: str = "Qwen/Qwen3-VL-30B-A3B-Instruct"
+    ai_max_concurrency: int = 4  # Max concurrent DeepInfra requests
+    ai_max_retries: int = 5  # Retries per AI request on 429/5xx/timeouts
+    ai_requests_per_minute: int = 0  # Token-bucket limit on request starts; 0 = unlimited
+    ai_tokens_per_minute: int = 0  # Token-bucket limit on estimated prompt + actual usage tokens; 0 = unlimited
+    # Send a batch's chunks concurrently; continuation chunks then get only the
+    # previous chunk's images as context, not its story state
+    ai_parallel_chunks: bool = False
+    # Inline images as base64 data URIs. When off, the source image URL is sent
+    # instead (~25% smaller requests) for image hosts that pass a one-time
+    # check for hotlinking without the manga site's Referer
+    ai_inline_images: bool = True
+    # Images from the end of the previous chunk re-sent for character continuity;
+    # 0 relies on the text story state alone (smaller continuation requests)
+    ai_context_images: int = 5
+    ai_refine_chunk_tokens: int = 8000  # Input token budget per refine call
+    # Refine long scripts through the provider's Batch API (cheaper, but may
+    # take up to 24h); falls back to direct calls if the batch fails
+    ai_refine_batch_api: bool = False
+    # Narrate chunks through the Batch API outside development (cheaper and
+    # separately rate-limited, but may take up to 24h per batch)
+    ai_batch_api: bool = False
+    ai_cache_enabled: bool = True  # Cache AI responses by request hash under content/_ai_cache
 
     # Crawler Configuration
     crawler_user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -35,9 +92,23 @@ class Settings(BaseSettings):
     crawler_delay_max: float = 3.0
     crawler_timeout: int = 30
     crawler_max_retries: int = 3
+    crawler_requests_per_minute: int = 0  # Token-bucket limit on page requests per manga site; 0 = unlimited
+    image_download_concurrency: int = 8  # Concurrent page downloads per chapter
+    chapter_download_concurrency: int = 3  # Chapters scraped + downloaded ahead concurrently
     batch_size: int = 10  # Chapters per AI batch
     max_chapters_dev: int = 5  # Max chapters to process in development mode
 
+    # Narration (Edge TTS)
+    tts_concurrency: int = 8  # Script segments synthesized concurrently
+    tts_segment_chars: int = 2000  # Target segment length; split at sentence ends
+    tts_cache_enabled: bool = True  # Cache synthesized audio by text + voice hash under content/_tts_cache
+    tts_cache_max_age_days: int = 7  # Entries unused for this long are deleted
+
+    # Video Generation
+    # H.264 encoder: auto (first available of h264_nvenc, h264_qsv,
+    # h264_videotoolbox, else libx264) or an ffmpeg encoder name
+    video_encoder: str = "auto"
+
     # Storage paths
     content_dir: str = "content"
     images_dir: str = "images"
@@ -54,33 +125,49 @@ class Settings(BaseSettings):
     youtube_default_privacy: str = "private"  # private, unlisted, public
     youtube_default_category: str = "22"  # 22 = People & Blogs
 
-    @property
-    def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins from comma-separated string."""
-        return [origin.strip() for origin in self.cors_origins.split(",")]
-
-    @property
-    def is_atlas_connection(self) -> bool:
-        """Check if using MongoDB Atlas (mongodb+srv://)."""
-        return self.mongodb_uri.startswith("mongodb+srv://")
-
-    @property
-    def connection_type(self) -> str:
-        """Return human-readable connection type."""
-        if self.is_atlas_connection:
-            return "MongoDB Atlas (Cloud)"
-        return "Local MongoDB"
-
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    # Derived values, computed once in __post_init__
+    cors_origins_list: List[str] = field(init=False, repr=False)
+    is_atlas_connection: bool = field(init=False, repr=False)
+    connection_type: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        is_atlas = self.mongodb_uri.startswith("mongodb+srv://")
+        object.__setattr__(
+            self,
+            "cors_origins_list",
+            [origin.strip() for origin in self.cors_origins.split(",")]
+        )
+        object.__setattr__(self, "is_atlas_connection", is_atlas)
+        object.__setattr__(
+            self,
+            "connection_type",
+            "MongoDB Atlas (Cloud)" if is_atlas else "Local MongoDB"
+        )
+
+    @classmethod
+    def load(cls) -> "Settings":
+        """Build settings from os.environ, falling back to field defaults."""
+        # Lowercased view built once, so any spelling (QWEN_MODEL, Qwen_Model)
+        # matches; the all-caps name wins if several spellings are set
+        environ = {key.lower(): value for key, value in os.environ.items()}
+        environ.update((key.lower(), value) for key, value in os.environ.items() if key.isupper())
+        values = {}
+        for f in fields(cls):
+            if not f.init:
+                continue
+            raw = environ.get(f.name)
+            if raw is not None:
+                values[f.name] = _cast(raw, f.default)
+        return cls(**values)
+
+
+# Singleton instance - import this instead of constructing Settings again
+settings = Settings.load()
 
 
-@lru_cache()
 def get_settings() -> Settings:
     """
-    Get cached settings instance.
-    Uses lru_cache to ensure settings are only loaded once.
+    Get the shared settings instance.
+    Kept for callers that prefer a function (e.g. FastAPI dependencies).
     """
-    return Settings()
+    return settings
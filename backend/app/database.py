@@ -1,53 +1,84 @@
 # AnCapTruyenLamVideo - Database Connection
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import Dict, Optional
+import asyncio
 import logging
 
-from .config import get_settings
+from .config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class Database:
     """
-    MongoDB database connection manager using Motor async driver.
+    MongoDB database connection manager using the native PyMongo async driver.
     Supports both MongoDB Atlas and local MongoDB connections.
     """
 
-    client: Optional[AsyncIOMotorClient] = None
-    db: Optional[AsyncIOMotorDatabase] = None
+    __slots__ = ("client", "db", "_loop", "_collections")
 
-    @classmethod
-    async def connect(cls) -> None:
+    def __init__(self):
+        self.client: Optional[AsyncMongoClient] = None
+        self.db: Optional[AsyncDatabase] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._collections: Dict[str, AsyncCollection] = {}
+
+    def _reset(self) -> None:
+        """Forget the current client and any cached collection handles."""
+        self.client = None
+        self.db = None
+        self._loop = None
+        self._collections.clear()
+
+    async def connect(self) -> None:
         """
         Establish connection to MongoDB.
         Works with both MongoDB Atlas (mongodb+srv://) and local MongoDB (mongodb://).
+        The client is shared per event loop: reconnecting on the same loop is a
+        no-op, and a client left over from a different loop is closed first.
         """
-        settings = get_settings()
+        loop = asyncio.get_running_loop()
+        if self.client is not None:
+            if self._loop is loop:
+                return
+            await self.client.close()
+            self._reset()
 
         try:
             logger.info(f"Connecting to {settings.connection_type}...")
             logger.info(f"Database name: {settings.database_name}")
 
-            # Create the Motor client
-            cls.client = AsyncIOMotorClient(
+            # Create the async client
+            self.client = AsyncMongoClient(
                 settings.mongodb_uri,
                 serverSelectionTimeoutMS=5000,  # 5 second timeout
-                connectTimeoutMS=5000
+                connectTimeoutMS=5000,
+                minPoolSize=settings.mongodb_min_pool_size,
+                maxPoolSize=settings.mongodb_max_pool_size
             )
+            self._loop = loop
 
             # Get the database
-            cls.db = cls.client[settings.database_name]
+            self.db = self.client[settings.database_name]
 
             # Verify the connection by pinging the server
-            await cls.client.admin.command("ping")
+            await self.client.admin.command("ping")
+
+            # Open the minimum pool up front so the first requests don't pay
+            # for socket creation and handshakes
+            await asyncio.gather(*(
+                self.client.admin.command("ping")
+                for _ in range(settings.mongodb_min_pool_size)
+            ))
 
             logger.info(f"Successfully connected to {settings.connection_type}")
             logger.info(f"Database: {settings.database_name}")
 
             # Log additional info for debugging
-            server_info = await cls.client.server_info()
+            server_info = await self.client.server_info()
             logger.info(f"MongoDB version: {server_info.get('version', 'unknown')}")
 
         except Exception as e:
@@ -66,27 +97,32 @@ class Database:
 
             raise
 
-    @classmethod
-    async def disconnect(cls) -> None:
+    async def disconnect(self) -> None:
         """Close the MongoDB connection."""
-        if cls.client:
-            cls.client.close()
+        if self.client:
+            await self.client.close()
+            self._reset()
             logger.info("Disconnected from MongoDB")
 
-    @classmethod
-    def get_database(cls) -> AsyncIOMotorDatabase:
+    def get_database(self) -> AsyncDatabase:
         """Get the database instance."""
-        if cls.db is None:
+        if self.db is None:
             raise RuntimeError("Database not connected. Call connect() first.")
-        return cls.db
+        return self.db
+
+    def get_collection(self, collection_name: str) -> AsyncCollection:
+        """Get a collection from the database (handles are cached per name)."""
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._collections[collection_name] = self.get_database()[collection_name]
+        return collection
+
 
-    @classmethod
-    def get_collection(cls, collection_name: str):
-        """Get a collection from the database."""
-        return cls.get_database()[collection_name]
+# Singleton instance
+database = Database()
 
 
 # Convenience function for dependency injection
-async def get_database() -> AsyncIOMotorDatabase:
+async def get_database() -> AsyncDatabase:
     """FastAPI dependency to get database instance."""
-    return Database.get_database()
+    return database.get_database()
@@ -1,15 +1,18 @@
 # AnCapTruyenLamVideo - FastAPI Main Application
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
-from .config import get_settings
-from .database import Database
+from .config import settings
+from .database import database
+from .models.crawler import warm_up_models
 from .routes.crawler import router as crawler_router
 from .routes.youtube import router as youtube_router
-from .services.telegram_bot import telegram_bot
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +21,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+__all__ = ["app"]
+
+API_VERSION = "2.0.0"
+
+# Health check results are reused for this long so probes don't ping
+# MongoDB on every request
+HEALTH_CACHE_TTL = 1.0
+_health_cache = {"checked_at": 0.0, "database": "unknown"}
+_health_lock = asyncio.Lock()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -25,14 +38,24 @@ async def lifespan(app: FastAPI):
     Application lifespan manager.
     Handles startup and shutdown events.
     """
+    # Imported here so the bot (and the crawler pipeline it depends on)
+    # is not loaded just by importing the app module.
+    from .services.ai_processor import ai_processor
+    from .services.crawler import CrawlerService
+    from .services.image_downloader import image_downloader
+    from .services.scraper import scraper
+    from .services.telegram_bot import telegram_bot
+
     # Startup
-    settings = get_settings()
     logger.info("=" * 60)
     logger.info("AnCapTruyenLamVideo API Starting...")
     logger.info("=" * 60)
 
+    warm_up_models()
+
     try:
-        await Database.connect()
+        await database.connect()
+        await CrawlerService.ensure_indexes()
         logger.info(f"Connection Type: {settings.connection_type}")
         logger.info(f"Database: {settings.database_name}")
         logger.info("=" * 60)
@@ -54,13 +77,14 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("AnCapTruyenLamVideo API Shutting down...")
     await telegram_bot.stop()
-    await Database.disconnect()
+    await CrawlerService.wait_background_tasks()
+    await ai_processor.aclose()
+    await scraper.close()
+    await image_downloader.close()
+    await database.disconnect()
 
 
-# Create FastAPI application
-app = FastAPI(
-    title="AnCapTruyenLamVideo API",
-    description="""
+API_DESCRIPTION = """
     AnCapTruyenLamVideo API - Manga Crawler and Video Script Generator.
 
     ## Features
@@ -77,17 +101,23 @@ app = FastAPI(
     - **GET /api/crawler/tasks/{id}/events** - SSE progress stream
     - **POST /api/crawler/tasks/{id}/cancel** - Cancel a running task
     - **GET /api/crawler/content/{id}** - Get generated scripts
-    """,
-    version="2.0.0",
+"""
+
+# Interactive docs and the OpenAPI schema are only served in development
+docs_enabled = settings.environment == "development"
+
+# Create FastAPI application
+app = FastAPI(
+    title="AnCapTruyenLamVideo API",
+    description=API_DESCRIPTION,
+    version=API_VERSION,
     lifespan=lifespan,
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if docs_enabled else None,
+    redoc_url="/redoc" if docs_enabled else None,
+    openapi_url="/openapi.json" if docs_enabled else None
 )
 
-# Get settings
-settings = get_settings()
-
 # Configure CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -107,25 +137,31 @@ async def root():
     """Root endpoint - API health check."""
     return {
         "message": "Welcome to AnCapTruyenLamVideo API",
-        "docs": "/docs",
-        "version": "1.0.0"
+        "docs": "/docs" if docs_enabled else None,
+        "version": API_VERSION
     }
 
 
 @app.get("/health", tags=["health"])
 async def health_check():
     """Health check endpoint."""
-    try:
-        # Test database connection
-        db = Database.get_database()
-        await db.command("ping")
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
+    if time.monotonic() - _health_cache["checked_at"] >= HEALTH_CACHE_TTL:
+        # Concurrent probes wait for a single ping instead of each sending one
+        async with _health_lock:
+            if time.monotonic() - _health_cache["checked_at"] >= HEALTH_CACHE_TTL:
+                try:
+                    # Test database connection
+                    db = database.get_database()
+                    await db.command("ping")
+                    db_status = "connected"
+                except Exception:
+                    db_status = "disconnected"
+                _health_cache["database"] = db_status
+                _health_cache["checked_at"] = time.monotonic()
 
     return {
         "status": "healthy",
-        "database": db_status,
+        "database": _health_cache["database"],
         "connection_type": settings.connection_type
     }
 
@@ -138,5 +174,8 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.backend_host,
         port=settings.backend_port,
-        reload=settings.environment == "development"
+        reload=settings.environment == "development",
+        loop=settings.uvicorn_loop,
+        http=settings.uvicorn_http,
+        workers=settings.uvicorn_workers
     )
@@ -1,2 +1,2 @@
 # AnCapTruyenLamVideo - Models Package
-from .crawler import CrawlerTask, CrawlerTaskCreate, ChapterInfo, ProgressEvent, TaskStatus
+from .crawler import CrawlerTask, CrawlerTaskCreate, ChapterInfo, ProgressEvent, TaskStatus, progress_event_adapter, chapter_list_adapter
@@ -1,9 +1,15 @@
 # AnCapTruyenLamVideo - Crawler Models
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List, Literal
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from functools import cached_property
+
+
+def utc_now() -> datetime:
+    """Current UTC time (timezone-aware replacement for datetime.utcnow)."""
+    return datetime.now(timezone.utc)
 
 
 class TaskStatus(str, Enum):
@@ -17,6 +23,28 @@ class TaskStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+EventType = Literal[
+    "task_started",
+    "chapters_found",
+    "chapter_crawled",
+    "image_downloaded",
+    "batch_processing",
+    "batch_completed",
+    "refining_script",
+    "video_generating",
+    "video_progress",
+    "video_completed",
+    "youtube_uploading",
+    "youtube_completed",
+    "task_completed",
+    "task_failed",
+    "progress_update"
+]
+
+# Events after which nothing more is published for a task
+TERMINAL_EVENT_TYPES = frozenset({"task_completed", "task_failed"})
+
+
 class ChapterInfo(BaseModel):
     """Information about a single chapter."""
     chapter_number: str
@@ -34,6 +62,8 @@ class CrawlerTaskCreate(BaseModel):
 
 class CrawlerTask(BaseModel):
     """Model for crawler task response."""
+    model_config = ConfigDict(populate_by_name=True, frozen=True, extra="ignore")
+
     id: str = Field(..., alias="_id", description="Task ID")
     manga_url: str
     manga_title: Optional[str] = None
@@ -49,34 +79,40 @@ class CrawlerTask(BaseModel):
     video_progress: int = 0
     youtube_video_id: Optional[str] = None
     error_message: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     completed_at: Optional[datetime] = None
 
-    class Config:
-        populate_by_name = True
-
 
 class ProgressEvent(BaseModel):
     """Model for SSE progress events."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     task_id: str
-    event_type: Literal[
-        "task_started",
-        "chapters_found",
-        "chapter_crawled",
-        "image_downloaded",
-        "batch_processing",
-        "batch_completed",
-        "refining_script",
-        "video_generating",
-        "video_progress",
-        "video_completed",
-        "youtube_uploading",
-        "youtube_completed",
-        "task_completed",
-        "task_failed",
-        "progress_update"
-    ]
+    event_type: EventType
     message: str
     progress: float = 0  # 0-100 percentage
     data: Optional[dict] = None
+
+    @cached_property
+    def sse_frame(self) -> bytes:
+        """Wire-format SSE frame, serialized once and shared by all subscribers."""
+        return b"event: %s\ndata: %s\n\n" % (
+            self.event_type.encode(),
+            progress_event_adapter.dump_json(self),
+        )
+
+
+# Built once at import so SSE serialization reuses the compiled serializer
+progress_event_adapter = TypeAdapter(ProgressEvent)
+# Validates and dumps a task's whole chapter list in one pass each
+chapter_list_adapter = TypeAdapter(List[ChapterInfo])
+
+
+def warm_up_models() -> None:
+    """
+    Run validation and serialization once for the hot-path models so the
+    first real request or SSE event doesn't pay any first-call cost.
+    """
+    ProgressEvent(task_id="warmup", event_type="progress_update", message="").sse_frame
+    CrawlerTask.model_validate({"_id": "warmup", "manga_url": ""}).model_dump_json(by_alias=True)
@@ -2,23 +2,67 @@
 
 import asyncio
 import logging
+import os
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-from sse_starlette.sse import EventSourceResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 
-from ..models.crawler import CrawlerTask, CrawlerTaskCreate, ProgressEvent
-from ..services.crawler import CrawlerService
+from ..models.crawler import CrawlerTask, CrawlerTaskCreate, ProgressEvent, TERMINAL_EVENT_TYPES
 from ..utils.event_bus import event_bus
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 router = APIRouter(prefix="/api/crawler", tags=["crawler"])
 
+# SSE comment line; EventSource clients ignore it but it keeps proxies from
+# closing an idle stream
+SSE_KEEPALIVE = b": keepalive\n\n"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# "truyenqq" also covers truyenqqno.com and the site's mirror domains
+ALLOWED_URL_MARKERS = ("truyenqq",)
+
+# A directory modified this recently isn't listed from the cache: on
+# filesystems with coarse timestamps, a file added in the same tick as the
+# last listing leaves the mtime unchanged
+LISTING_SETTLE_NS = 1_000_000_000
+
+
+def _crawler_service():
+    """Import CrawlerService on first use to keep app startup light."""
+    from ..services.crawler import CrawlerService
+    return CrawlerService
+
+
+@lru_cache(maxsize=256)
+def _scan_files(directory: str, suffix: str, mtime_ns: int) -> Tuple[str, ...]:
+    """
+    Sorted names of files in directory ending with suffix.
+    mtime_ns is part of the cache key, so adding or removing a file
+    (which bumps the directory mtime) invalidates the cached listing.
+    """
+    with os.scandir(directory) as entries:
+        return tuple(sorted(
+            entry.name for entry in entries
+            if entry.name.endswith(suffix) and entry.is_file()
+        ))
+
+
+def _list_files(directory: str, suffix: str) -> List[str]:
+    """List files in a task directory, reusing the cached scan when unchanged."""
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if time.time_ns() - mtime_ns < LISTING_SETTLE_NS:
+        return list(_scan_files.__wrapped__(directory, suffix, mtime_ns))
+    return list(_scan_files(directory, suffix, mtime_ns))
+
 
 @router.post("/tasks", status_code=201, response_model=CrawlerTask)
 async def create_crawl_task(
@@ -27,24 +71,27 @@ async def create_crawl_task(
 ):
     """Create and start a new crawl task."""
     # Validate URL
-    if "truyenqqno.com" not in task.manga_url and "truyenqq" not in task.manga_url:
+    if not any(marker in task.manga_url for marker in ALLOWED_URL_MARKERS):
         raise HTTPException(400, "URL must be from truyenqqno.com")
 
-    created = await CrawlerService.create_task(task)
-    background_tasks.add_task(CrawlerService.start_crawl, created["_id"])
+    created = await _crawler_service().create_task(task)
+    background_tasks.add_task(_crawler_service().start_crawl, created["_id"])
     return created
 
 
 @router.get("/tasks", response_model=List[CrawlerTask])
 async def get_all_tasks():
     """Get all crawl tasks."""
-    return await CrawlerService.get_all_tasks()
+    # Documents are already projected to the CrawlerTask fields, so they are
+    # serialized directly instead of being re-validated model by model
+    tasks = await _crawler_service().get_all_tasks()
+    return ORJSONResponse(tasks)
 
 
 @router.get("/tasks/{task_id}", response_model=CrawlerTask)
 async def get_task(task_id: str):
     """Get a specific task by ID."""
-    task = await CrawlerService.get_task(task_id)
+    task = await _crawler_service().get_task(task_id)
     if not task:
         raise HTTPException(404, "Task not found")
     return task
@@ -53,7 +100,7 @@ async def get_task(task_id: str):
 @router.post("/tasks/{task_id}/cancel")
 async def cancel_task(task_id: str):
     """Cancel a running task."""
-    success = await CrawlerService.cancel_task(task_id)
+    success = await _crawler_service().cancel_task(task_id)
     if not success:
         raise HTTPException(400, "Cannot cancel task (not running or not found)")
     return {"message": "Task cancelled"}
@@ -63,8 +110,7 @@ async def cancel_task(task_id: str):
 async def task_events(task_id: str):
     """SSE endpoint for real-time task progress."""
     # Verify task exists
-    task = await CrawlerService.get_task(task_id)
-    if not task:
+    if not await _crawler_service().task_exists(task_id):
         raise HTTPException(404, "Task not found")
 
     async def event_generator():
@@ -72,44 +118,45 @@ async def task_events(task_id: str):
         try:
             while True:
                 try:
-                    # Wait for event with timeout
-                    event: ProgressEvent = await asyncio.wait_for(queue.get(), timeout=30)
-                    yield {
-                        "event": event.event_type,
-                        "data": event.model_dump_json()
-                    }
-                    # End stream on completion or failure
-                    if event.event_type in ["task_completed", "task_failed"]:
-                        break
-                except asyncio.TimeoutError:
-                    # Send keepalive
-                    yield {"event": "keepalive", "data": "{}"}
+                    # Drain already-queued events without arming a timeout
+                    event: ProgressEvent = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    try:
+                        # Wait for event with timeout
+                        event = await asyncio.wait_for(queue.get(), timeout=30)
+                    except asyncio.TimeoutError:
+                        # Send keepalive
+                        yield SSE_KEEPALIVE
+                        continue
+
+                yield event.sse_frame
+                # End stream on completion or failure
+                if event.event_type in TERMINAL_EVENT_TYPES:
+                    break
         finally:
             event_bus.unsubscribe(task_id, queue)
 
-    return EventSourceResponse(event_generator())
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 
 @router.get("/content/{task_id}")
 async def get_task_content(task_id: str):
     """Get list of generated script files for a task."""
-    task = await CrawlerService.get_task(task_id)
-    if not task:
+    if not await _crawler_service().task_exists(task_id):
         raise HTTPException(404, "Task not found")
 
-    content_path = Path(settings.content_dir) / task_id
-    if not content_path.exists():
-        return {"files": []}
-
-    files = [str(f.name) for f in content_path.iterdir() if f.is_file() and f.suffix == ".txt"]
-    return {"files": sorted(files)}
+    content_path = os.path.join(settings.content_dir, task_id)
+    return {"files": _list_files(content_path, ".txt")}
 
 
 @router.get("/content/{task_id}/{filename}")
 async def download_script(task_id: str, filename: str):
     """Download a specific script file."""
-    task = await CrawlerService.get_task(task_id)
-    if not task:
+    if not await _crawler_service().task_exists(task_id):
         raise HTTPException(404, "Task not found")
 
     file_path = Path(settings.content_dir) / task_id / filename
@@ -126,23 +173,17 @@ async def download_script(task_id: str, filename: str):
 @router.get("/videos/{task_id}")
 async def get_task_videos(task_id: str):
     """Get list of generated video files for a task."""
-    task = await CrawlerService.get_task(task_id)
-    if not task:
+    if not await _crawler_service().task_exists(task_id):
         raise HTTPException(404, "Task not found")
 
-    videos_path = Path(settings.videos_dir) / task_id
-    if not videos_path.exists():
-        return {"files": []}
-
-    files = [str(f.name) for f in videos_path.iterdir() if f.is_file() and f.suffix == ".mp4"]
-    return {"files": sorted(files)}
+    videos_path = os.path.join(settings.videos_dir, task_id)
+    return {"files": _list_files(videos_path, ".mp4")}
 
 
 @router.get("/videos/{task_id}/{filename}")
 async def download_video(task_id: str, filename: str):
     """Download a specific video file."""
-    task = await CrawlerService.get_task(task_id)
-    if not task:
+    if not await _crawler_service().task_exists(task_id):
         raise HTTPException(404, "Task not found")
 
     file_path = Path(settings.videos_dir) / task_id / filename
@@ -4,19 +4,23 @@ import logging
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse, HTMLResponse
 
-from ..config import get_settings
-from ..services.youtube_uploader import youtube_uploader
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 router = APIRouter(prefix="/api/youtube", tags=["youtube"])
 
 
+def _uploader():
+    """Import the uploader on first use (google client libraries are heavy)."""
+    from ..services.youtube_uploader import youtube_uploader
+    return youtube_uploader
+
+
 @router.get("/status")
 async def get_youtube_status():
     """Check YouTube authentication status."""
-    is_authenticated = youtube_uploader.is_authenticated()
+    is_authenticated = _uploader().is_authenticated()
     return {
         "enabled": settings.youtube_enabled,
         "authenticated": is_authenticated,
@@ -31,7 +35,7 @@ async def start_youtube_auth(request: Request):
         # Get the callback URL based on request
         callback_url = str(request.url_for("youtube_oauth_callback"))
 
-        auth_url = youtube_uploader.get_auth_url(callback_url)
+        auth_url = _uploader().get_auth_url(callback_url)
         if not auth_url:
             raise HTTPException(
                 status_code=500,
@@ -76,7 +80,7 @@ async def youtube_oauth_callback(code: str = None, error: str = None):
         """)
 
     try:
-        success = youtube_uploader.complete_auth(code)
+        success = _uploader().complete_auth(code)
 
         if success:
             return HTMLResponse(content="""
@@ -116,7 +120,7 @@ async def youtube_oauth_callback(code: str = None, error: str = None):
 async def revoke_youtube_auth():
     """Revoke YouTube authentication."""
     try:
-        youtube_uploader.revoke_credentials()
+        _uploader().revoke_credentials()
         return {"message": "YouTube credentials revoked"}
     except Exception as e:
         logger.error(f"Error revoking credentials: {e}")
@@ -1,7 +1,24 @@
 # AnCapTruyenLamVideo - Services Package
-from .crawler import CrawlerService
-from .scraper import scraper
-from .image_downloader import image_downloader
-from .ai_processor import ai_processor
-from .tts_service import tts_service
-from .video_generator import video_generator
+# Exports are resolved lazily (PEP 562) so importing one service does not
+# pull in the dependencies of every other service.
+import importlib
+
+_EXPORTS = {
+    "CrawlerService": ".crawler",
+    "scraper": ".scraper",
+    "image_downloader": ".image_downloader",
+    "ai_processor": ".ai_processor",
+    "tts_service": ".tts_service",
+    "video_generator": ".video_generator",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
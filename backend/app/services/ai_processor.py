@@ -1,22 +1,150 @@
 # AnCapTruyenLamVideo - AI Processor Service
 
+import asyncio
+import base64
+import hashlib
 import logging
+import os
+import random
 import re
+import shutil
+import uuid
+from collections import deque
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from string import Template
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Callable, Tuple
 from datetime import datetime
 
-from openai import AsyncOpenAI
+import aiofiles
+import httpx
+import orjson
+import tiktoken
+import xxhash
+from aiolimiter import AsyncLimiter
+from openai import NOT_GIVEN, APIConnectionError, AsyncOpenAI
 
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+
+# Regexes used by the script post-processing, compiled once at import.
+# _SENTENCE_RE matches a sentence (text up to a run of . ! ?) and its punctuation.
+_SENTENCE_RE = re.compile(r"([^.!?]*)([.!?]+|$)")
+_WS_RE = re.compile(r"\s+")
+_PARA_SPLIT_RE = re.compile(r"\n\n+")
+_SENTENCE_END_RE = re.compile(r"[.!?]+\s+")
+_SENTENCE_BREAKS = (" ", "\n", "\n\n")
+# Chapter range -> filename part in one pass ("1 - 10" -> "1_to_10")
+_CHAPTER_RANGE_TRANS = str.maketrans({" ": "_", "-": "to"})
+
+
+def _tail_by_sentences(text: str, max_chars: int) -> str:
+    """
+    At most max_chars from the end of text, starting at a sentence boundary
+    rather than mid-word. Falls back to a plain slice if the window holds no
+    sentence end.
+    """
+    if len(text) <= max_chars:
+        return text
+    window = text[-max_chars:]
+    boundary = _SENTENCE_END_RE.search(window)
+    if boundary is None or boundary.end() == len(window):
+        return window
+    return window[boundary.end():]
+
+
+# Rough token estimate used when the tokenizer can't be loaded
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _token_encoder() -> Optional[tiktoken.Encoding]:
+    """
+    Shared tokenizer for refine budgets, loaded on first use. cl100k is not
+    Qwen's own vocabulary but tracks it far better than character counts
+    for Vietnamese text. Its BPE file is downloaded on first load; if that
+    fails (e.g. offline), returns None and budgets fall back to characters.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding, estimating tokens from characters: {e}")
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _chapter_header_part(chapter: str) -> dict:
+    """
+    Text part announcing a chapter. Memoized so repeated headers share one
+    dict; request builders only read these, never mutate them.
+    """
+    return {"type": "text", "text": f"\n--- CHƯƠNG {chapter} ---\n"}
+
+
+@lru_cache(maxsize=32)
+def _build_prompt(manga_title: str) -> str:
+    """Build the Vietnamese story narration prompt (once per manga title)."""
+    return f"""Chuyển thể manga "{manga_title}" thành truyện văn xuôi tiếng Việt.
+
+HƯỚNG DẪN CHI TIẾT:
+1. Quan sát kỹ từng hình ảnh, xác định các nhân vật chính
+2. ĐỌC TÊN NHÂN VẬT từ lời thoại trong manga và sử dụng đúng tên đó (giữ nguyên tên gốc)
+3. Bắt đầu bằng việc mô tả bối cảnh/khung cảnh
+4. Kể lại hành động và đối thoại theo đúng thứ tự hình ảnh
+5. Mô tả biểu cảm, cảm xúc của nhân vật
+6. Chuyển âm thanh/hiệu ứng thành mô tả văn xuôi (không viết nguyên văn)
+
+BẮT ĐẦU KỂ CHUYỆN NGAY (không viết lời giới thiệu):
+"""
+
+
+_MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+
+
+# Data URI prefix per file extension, built once instead of per image
+_DATA_URI_PREFIXES = {ext: f"data:{media_type};base64," for ext, media_type in _MEDIA_TYPES.items()}
+
+
+def _load_data_uri(path: str) -> str:
+    """
+    Read an image file and return it as a base64 data URI (blocking).
+    Decoded to str here because the JSON request body (and the cache key
+    hashed from it) needs str; callers hold one URI per image only while its
+    chunk is being sent.
+    """
+    prefix = _DATA_URI_PREFIXES.get(os.path.splitext(path)[1].lower(), _DATA_URI_PREFIXES[".jpg"])
+    with open(path, "rb") as f:
+        b64 = base64.b64encode(f.read()).decode("ascii")
+    return prefix + b64
+
+
+@dataclass(slots=True)
+class _ApiJob:
+    """A queued API call and the future its caller is waiting on."""
+    run: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    tokens: int = 0  # Estimated token cost, charged to the TPM bucket before running
+    task: Optional[asyncio.Task] = None  # The running job, once a worker starts it
 
 
 class AIProcessor:
     """Processes manga images with Qwen3-VL via DeepInfra."""
 
+    # Generated text kept in memory per chunk while streaming (story state input)
+    STREAM_TAIL_CHARS = 2000
+    # Streamed text is written to disk in pieces of about this size
+    STREAM_FLUSH_CHARS = 16384
+
     STORY_STATE_PROMPT = """Tóm tắt TRẠNG THÁI TRUYỆN từ đoạn văn sau. Format ngắn gọn:
 
 1. BỐI CẢNH: [Địa điểm và thời gian hiện tại - 1 câu]
@@ -26,6 +154,7 @@ class AIProcessor:
 5. ĐANG DIỄN RA: [Xung đột hoặc tình huống chưa giải quyết]
 
 CHỈ TRẢ VỀ TÓM TẮT, KHÔNG VIẾT GÌ KHÁC."""
+    STORY_STATE_MESSAGE = {"role": "system", "content": STORY_STATE_PROMPT}
 
     SYSTEM_PROMPT = """Bạn là người kể chuyện manga chuyên nghiệp. Nhiệm vụ: chuyển thể manga thành văn xuôi tiếng Việt hấp dẫn.
 
@@ -65,78 +194,381 @@ TUYỆT ĐỐI KHÔNG ĐƯỢC:
 - Viết "Tôi sẽ...", "Hãy để tôi...", "Được rồi...", hay bất kỳ câu trả lời AI nào
 - Tóm tắt sơ sài, phải kể chi tiết
 - Viết âm thanh/hiệu ứng nguyên văn (BANG, ドドド, etc.)"""
+    SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
     def __init__(self):
+        # One pooled HTTP/2 client so TLS connections to DeepInfra are reused.
+        # Keep-alive covers every worker; the extra headroom absorbs bursts.
+        # The transport retries failed connection attempts (not requests).
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_concurrency * 2,
+                max_keepalive_connections=settings.ai_max_concurrency
+            ),
+        )
+        self._http_client = httpx.AsyncClient(
+            transport=transport,
+            # Waiting for a pooled connection is bounded by the dispatcher,
+            # so the pool itself never times out
+            timeout=httpx.Timeout(connect=10.0, read=120.0, write=60.0, pool=None),
+        )
         self.client = AsyncOpenAI(
             api_key=settings.deepinfra_api_key,
             base_url=settings.deepinfra_base_url,
+            http_client=self._http_client,
+            # The SDK backs off exponentially with jitter and honours Retry-After
+            # on 429/5xx/timeouts, so chunks aren't lost to transient errors
+            max_retries=settings.ai_max_retries,
+        )
+        # Shared dispatcher: every DeepInfra request is queued here and run by
+        # ai_max_concurrency workers, started lazily on the running loop
+        self._work_q: Optional[asyncio.Queue] = None
+        self._work_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        # Token bucket shared by all workers, so bursts and the steady rate
+        # both stay under the provider's requests-per-minute limit
+        self._rate_limit: Optional[AsyncLimiter] = (
+            AsyncLimiter(settings.ai_requests_per_minute, 60)
+            if settings.ai_requests_per_minute > 0 else None
+        )
+        # Second bucket for tokens per minute: requests are charged an estimate
+        # up front and any excess reported in `usage` once they finish
+        self._token_limit: Optional[AsyncLimiter] = (
+            AsyncLimiter(settings.ai_tokens_per_minute, 60)
+            if settings.ai_tokens_per_minute > 0 else None
         )
         self.content_path = Path(settings.content_dir)
         self.content_path.mkdir(parents=True, exist_ok=True)
+        self.cache_path = self.content_path / "_ai_cache"
+        if settings.ai_cache_enabled:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+
+    async def aclose(self):
+        """Stop the dispatcher workers and close the pooled HTTP client (called on app shutdown)."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self._http_client.aclose()
+
+    def _ensure_workers(self) -> None:
+        """Start the dispatcher workers on first use (or after a loop change)."""
+        loop = asyncio.get_running_loop()
+        if self._workers and self._work_loop is loop:
+            return
+        self._work_q = asyncio.Queue()
+        self._work_loop = loop
+        self._workers = [
+            loop.create_task(self._worker()) for _ in range(settings.ai_max_concurrency)
+        ]
 
-    def _build_prompt(self, manga_title: str, part_info: str) -> str:
-        """Build the Vietnamese story narration prompt."""
-        return f"""Chuyển thể manga "{manga_title}" thành truyện văn xuôi tiếng Việt.
-
-HƯỚNG DẪN CHI TIẾT:
-1. Quan sát kỹ từng hình ảnh, xác định các nhân vật chính
-2. ĐỌC TÊN NHÂN VẬT từ lời thoại trong manga và sử dụng đúng tên đó (giữ nguyên tên gốc)
-3. Bắt đầu bằng việc mô tả bối cảnh/khung cảnh
-4. Kể lại hành động và đối thoại theo đúng thứ tự hình ảnh
-5. Mô tả biểu cảm, cảm xúc của nhân vật
-6. Chuyển âm thanh/hiệu ứng thành mô tả văn xuôi (không viết nguyên văn)
+    # Rough prompt cost of one image for the TPM estimate (vision models
+    # bill a few hundred to ~1.5k tokens per manga page)
+    IMAGE_TOKEN_ESTIMATE = 1200
+
+    def _estimate_tokens(self, messages: list) -> int:
+        """Prompt token estimate for the TPM bucket: ~4 chars per token plus a flat cost per image."""
+        chars = 0
+        images = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                chars += len(content)
+                continue
+            for part in content:
+                if part["type"] == "text":
+                    chars += len(part["text"])
+                else:
+                    images += 1
+        return chars // 4 + images * self.IMAGE_TOKEN_ESTIMATE
+
+    async def _throttle(self, tokens: int = 0) -> None:
+        """
+        Wait for a token from the AI_REQUESTS_PER_MINUTE bucket and for
+        `tokens` from the AI_TOKENS_PER_MINUTE bucket (no-ops when unlimited).
+        """
+        if self._rate_limit is not None:
+            await self._rate_limit.acquire()
+        if self._token_limit is not None and tokens > 0:
+            await self._token_limit.acquire(min(tokens, self._token_limit.max_rate))
+
+    async def _charge_usage(self, estimated: int, usage: Any) -> None:
+        """Charge tokens a finished request used beyond its estimate to the TPM bucket."""
+        if self._token_limit is None or usage is None:
+            return
+        excess = usage.total_tokens - estimated
+        if excess > 0:
+            await self._token_limit.acquire(min(excess, self._token_limit.max_rate))
+
+    async def _worker(self) -> None:
+        """
+        Run queued API jobs one at a time, resolving each job's future. Each
+        job runs as its own task, so it can be cancelled without stopping
+        the worker.
+        """
+        while True:
+            job = await self._work_q.get()
+            try:
+                if job.future.cancelled():
+                    continue
+                job.task = asyncio.ensure_future(self._run_job(job))
+                try:
+                    # wait() doesn't raise the job's own cancellation
+                    await asyncio.wait({job.task})
+                except asyncio.CancelledError:
+                    # The worker itself is stopping (aclose)
+                    job.task.cancel()
+                    raise
+            finally:
+                self._work_q.task_done()
+
+    async def _run_job(self, job: _ApiJob) -> None:
+        """Throttle and run one job, settling its future with the outcome."""
+        try:
+            await self._throttle(job.tokens)
+            result = await job.run()
+        except asyncio.CancelledError:
+            # This job was cancelled (its caller gave up, or shutdown)
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
 
-BẮT ĐẦU KỂ CHUYỆN NGAY (không viết lời giới thiệu):
-"""
+    async def _dispatch(self, run: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """
+        Queue an API call for the shared workers and wait for its result.
+        Every batch and refine call goes through the same FIFO queue, so
+        concurrent callers share ai_max_concurrency slots fairly.
+        Cancelling the caller (e.g. a crawl task cancel) cancels the job too:
+        a queued job is skipped and a running one is stopped, freeing its slot.
+        """
+        self._ensure_workers()
+        future = self._work_loop.create_future()
+        job = _ApiJob(run, future, tokens)
 
-    def _build_continuation_prompt(self, manga_title: str, part_info: str, previous_story: str = "") -> str:
-        """Build prompt for continuation parts with context."""
-        context_note = ""
-        if previous_story:
-            # Get last ~800 characters for context
-            story_context = previous_story[-800:] if len(previous_story) > 800 else previous_story
-            context_note = f"""
-CÂU CHUYỆN TRƯỚC ĐÓ (để tiếp nối, giữ nguyên tên nhân vật):
----
-{story_context}
----
+        def stop_job(done: asyncio.Future) -> None:
+            if done.cancelled() and job.task is not None:
+                job.task.cancel()
 
-"""
-        return f"""{context_note}Tiếp tục kể câu chuyện "{manga_title}".
+        future.add_done_callback(stop_job)
+        await self._work_q.put(job)
+        return await future
 
-LƯU Ý QUAN TRỌNG:
-- Giữ nguyên tên các nhân vật đã đặt ở phần trước
-- Tiếp nối mạch truyện một cách tự nhiên
-- Không lặp lại nội dung đã kể
-- Không viết lời chào hay bình luận
+    async def _call_ai_api(self, messages: list, max_tokens: int = 8000, temperature: float = 0.7) -> str:
+        """
+        Make a single API call to the AI model.
+        Responses are cached on disk by request hash (story state, refine).
+        """
+        cache_file = None
+        if settings.ai_cache_enabled:
+            cache_file = self.cache_path / f"{self._cache_key(messages, max_tokens, temperature)}.txt"
+            # Lookup and read are one thread hop; no stat() on the event loop
+            cached = await asyncio.to_thread(self._read_cache_entry, cache_file)
+            if cached is not None:
+                logger.info(f"AI cache hit: {cache_file.name}")
+                return cached
+            logger.info(f"AI cache miss: {cache_file.name}")
+
+        estimated = self._estimate_tokens(messages)
+
+        async def run() -> str:
+            response = await self.client.chat.completions.create(
+                model=settings.qwen_model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            await self._charge_usage(estimated, response.usage)
+            return response.choices[0].message.content
 
-TIẾP TỤC CÂU CHUYỆN:
-"""
+        result = await self._dispatch(run, estimated)
+        if cache_file is not None and result:
+            await asyncio.to_thread(self._write_cache_entry, cache_file, result)
+        return result
 
-    async def _call_ai_api(self, messages: list, max_tokens: int = 8000, temperature: float = 0.7) -> str:
-        """Make a single API call to the AI model."""
-        response = await self.client.chat.completions.create(
+    def _cache_key(self, messages: list, max_tokens: int, temperature: float) -> str:
+        """BLAKE2b digest of the model, sampling params and every message part of a request."""
+        digest = hashlib.blake2b(
+            f"{settings.qwen_model}|{max_tokens}|{temperature}".encode(), digest_size=20
+        )
+        for message in messages:
+            digest.update(message["role"].encode())
+            content = message["content"]
+            if isinstance(content, str):
+                digest.update(content.encode())
+                continue
+            for part in content:
+                if part["type"] == "text":
+                    digest.update(part["text"].encode())
+                else:
+                    digest.update(part["image_url"]["url"].encode())
+        return digest.hexdigest()
+
+    async def _stream_to_file(
+        self,
+        messages: list,
+        out_path: Path,
+        max_tokens: int = 8000,
+        temperature: float = 0.7
+    ) -> Tuple[int, str]:
+        """
+        Stream a completion straight into out_path instead of holding it in memory.
+        Returns (characters written, last STREAM_TAIL_CHARS characters) - the tail
+        is all the chunk loop needs for story state and the transition paragraph.
+        The SDK retries failed requests itself; a stream that breaks midway is
+        restarted here with jittered exponential backoff.
+        """
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(settings.ai_max_retries + 1):
+            try:
+                return await self._dispatch(
+                    lambda: self._stream_completion(messages, out_path, max_tokens, temperature, estimated),
+                    estimated
+                )
+            except (APIConnectionError, httpx.TransportError) as e:
+                if attempt == settings.ai_max_retries:
+                    raise
+                delay = min(30.0, 2.0 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Stream for {out_path.name} broke ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _stream_completion(
+        self,
+        messages: list,
+        out_path: Path,
+        max_tokens: int,
+        temperature: float,
+        estimated: int = 0
+    ) -> Tuple[int, str]:
+        """Body of _stream_to_file, run by a dispatcher worker."""
+        tail = deque()
+        tail_len = 0
+        written = 0
+        usage = None
+        stream = await self.client.chat.completions.create(
             model=settings.qwen_model,
             messages=messages,
             max_tokens=max_tokens,
             temperature=temperature,
+            stream=True,
+            # The final event then carries token usage for the TPM bucket
+            stream_options={"include_usage": True} if self._token_limit is not None else NOT_GIVEN,
         )
-        return response.choices[0].message.content
+        # Deltas are a few characters each, so they are collected and handed
+        # to aiofiles' thread in STREAM_FLUSH_CHARS pieces rather than one
+        # thread hop per delta
+        pending = []
+        pending_len = 0
+        async with aiofiles.open(out_path, "w", encoding="utf-8") as f:
+            async for event in stream:
+                if event.usage is not None:
+                    usage = event.usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if not delta:
+                    continue
+                pending.append(delta)
+                pending_len += len(delta)
+                if pending_len >= self.STREAM_FLUSH_CHARS:
+                    await f.write("".join(pending))
+                    pending.clear()
+                    pending_len = 0
+                written += len(delta)
+                tail.append(delta)
+                tail_len += len(delta)
+                while tail_len - len(tail[0]) >= self.STREAM_TAIL_CHARS:
+                    tail_len -= len(tail.popleft())
+            if pending:
+                await f.write("".join(pending))
+        await self._charge_usage(estimated, usage)
+        return written, "".join(tail)[-self.STREAM_TAIL_CHARS:]
+
+    def _read_tail(self, path: Path) -> Tuple[int, str]:
+        """(characters, last STREAM_TAIL_CHARS characters) of an existing chunk file."""
+        text = path.read_text(encoding="utf-8")
+        return len(text), text[-self.STREAM_TAIL_CHARS:]
+
+    async def _call_chunk_api(self, content: list, out_path: Path) -> Tuple[int, str]:
+        """
+        Narrate one chunk into out_path. Responses are cached on disk by content
+        hash, so re-running a task (or a retry) skips chunks that were already generated.
+        Returns (characters written, tail of the text) as _stream_to_file.
+        """
+        messages = self._build_chunk_messages(content)
+        if not settings.ai_cache_enabled:
+            return await self._stream_to_file(messages, out_path)
+
+        cache_file = self.cache_path / f"{self._cache_key(messages, 8000, 0.7)}.txt"
+        cached = await asyncio.to_thread(self._restore_cache_entry, cache_file, out_path)
+        if cached is not None:
+            logger.info(f"AI cache hit: {cache_file.name}")
+            return cached
+        logger.info(f"AI cache miss: {cache_file.name}")
+
+        result = await self._stream_to_file(messages, out_path)
+        await asyncio.to_thread(self._store_cache_entry, out_path, cache_file)
+        return result
+
+    @staticmethod
+    def _read_cache_entry(cache_file: Path) -> Optional[str]:
+        """Cached response text, or None on a miss."""
+        try:
+            return cache_file.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
 
-    async def _extract_story_state(self, story_text: str) -> str:
+    def _restore_cache_entry(self, cache_file: Path, out_path: Path) -> Optional[Tuple[int, str]]:
+        """Copy a cached chunk to out_path and return its (length, tail), or None on a miss."""
+        try:
+            shutil.copyfile(cache_file, out_path)
+        except FileNotFoundError:
+            return None
+        return self._read_tail(out_path)
+
+    def _store_cache_entry(self, src: Path, cache_file: Path) -> None:
+        """Copy to a temp file and rename so readers never see a partial entry."""
+        tmp_file = cache_file.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(src, tmp_file)
+        os.replace(tmp_file, cache_file)
+
+    def _write_cache_entry(self, cache_file: Path, text: str) -> None:
+        """Write a response to the cache via temp file + rename, like _store_cache_entry."""
+        tmp_file = cache_file.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_file.write_text(text, encoding="utf-8")
+        os.replace(tmp_file, cache_file)
+
+    async def _extract_story_state(self, story_text: str, prev_state: str = "") -> str:
         """
         Extract structured story state from generated text for context passing.
         This gives the next chunk a clear understanding of where the story is.
+        With prev_state the state is updated recursively: the previous summary
+        plus only the newest text, instead of re-reading a long tail each time.
         """
         if not story_text or len(story_text) < 200:
-            return ""
+            return prev_state
 
-        # Use last portion of story for extraction
-        text_to_analyze = story_text[-2000:] if len(story_text) > 2000 else story_text
+        if prev_state:
+            user_content = (
+                f"TRẠNG THÁI TRƯỚC:\n{prev_state}\n\n"
+                f"ĐOẠN MỚI:\n{_tail_by_sentences(story_text, 1500)}\n\n"
+                "Cập nhật trạng thái trước theo đoạn mới."
+            )
+        else:
+            # Use last portion of story for extraction
+            text_to_analyze = _tail_by_sentences(story_text, 2000)
+            user_content = f"Đoạn truyện:\n\n{text_to_analyze}"
 
         messages = [
-            {"role": "system", "content": self.STORY_STATE_PROMPT},
-            {"role": "user", "content": f"Đoạn truyện:\n\n{text_to_analyze}"}
+            self.STORY_STATE_MESSAGE,
+            {"role": "user", "content": user_content}
         ]
 
         try:
@@ -145,7 +577,7 @@ TIẾP TỤC CÂU CHUYỆN:
             return result
         except Exception as e:
             logger.error(f"Story state extraction error: {e}")
-            return ""
+            return prev_state
 
     def _build_continuation_prompt_with_state(
         self,
@@ -180,43 +612,182 @@ LƯU Ý QUAN TRỌNG:
 TIẾP TỤC CÂU CHUYỆN:
 """
 
+    # Fixed content parts, shared by every request so the serialized prefix
+    # is byte-identical across chunks (lets the provider reuse prompt caches)
+    PREVIOUS_IMAGES_PART = {"type": "text", "text": "\n[HÌNH ẢNH CUỐI TỪ PHẦN TRƯỚC - để nhận diện nhân vật]:\n"}
+    NEW_IMAGES_PART = {"type": "text", "text": "\n[HÌNH ẢNH MỚI - tiếp tục kể từ đây]:\n"}
+
+    def _image_part(self, img: dict) -> dict:
+        """
+        Image content item: the source URL when available, else an inline
+        base64 data URI - encoded from disk here unless already attached.
+        Reads the file, so call it from a worker thread.
+        """
+        url = img.get("remote_url") or img.get("data_uri") or _load_data_uri(img["path"])
+        return {
+            "type": "image_url",
+            "image_url": {"url": url}
+        }
+
+    def _build_chunk_content(
+        self,
+        chunk: List[Tuple[str, dict]],
+        chunk_idx: int,
+        manga_title: str,
+        story_state: str = "",
+        last_paragraph: str = "",
+        previous_images: Optional[Iterable[dict]] = None,
+        body: Optional[list] = None
+    ) -> list:
+        """
+        Build the user message content (prompt, context images, chunk images) for one chunk.
+        body is the chunk's prebuilt _build_chunk_body() output, if the caller has it.
+        """
+        content = []
+
+        if chunk_idx == 0:
+            # First chunk - use base prompt
+            prompt = _build_prompt(manga_title)
+            content.append({
+                "type": "text",
+                "text": prompt
+            })
+        else:
+            # Continuation chunks - add structured story state context
+            prompt = self._build_continuation_prompt_with_state(
+                manga_title,
+                story_state,
+                last_paragraph
+            )
+            content.append({
+                "type": "text",
+                "text": prompt
+            })
+
+            # Add the last images from previous chunk for visual continuity
+            if previous_images:
+                content.append(self.PREVIOUS_IMAGES_PART)
+                for img in previous_images:
+                    content.append(self._image_part(img))
+                content.append(self.NEW_IMAGES_PART)
+
+        content.extend(self._build_chunk_body(chunk) if body is None else body)
+        return self._merge_text_parts(content)
+
+    @staticmethod
+    def _merge_text_parts(content: list) -> list:
+        """
+        Collapse runs of adjacent text parts (prompt + context marker, marker +
+        chapter header) into one part. Same text the model sees, fewer parts.
+        """
+        merged = []
+        text_buf = []
+        for part in content:
+            if part["type"] == "text":
+                text_buf.append(part["text"])
+                continue
+            if text_buf:
+                merged.append({"type": "text", "text": "".join(text_buf)})
+                text_buf = []
+            merged.append(part)
+        if text_buf:
+            merged.append({"type": "text", "text": "".join(text_buf)})
+        return merged
+
+    def _build_chunk_body(self, chunk: List[Tuple[str, dict]]) -> list:
+        """
+        Chapter headers and image parts for a chunk. Unlike the prompt this
+        doesn't depend on earlier chunks' output, so it can be built ahead.
+        """
+        content = []
+
+        # Track current chapter for headers
+        current_chapter = None
+
+        for chapter, img in chunk:
+            # Add chapter header when chapter changes
+            if chapter != current_chapter:
+                current_chapter = chapter
+                content.append(_chapter_header_part(current_chapter))
+
+            # Add image
+            content.append(self._image_part(img))
+
+        return content
+
+    def _prepare_chunk_body(self, chunk: List[Tuple[str, dict]]) -> list:
+        """
+        _build_chunk_body for the sequential path: the data URIs are also
+        attached to the image dicts, so the images re-sent as the next
+        chunk's context aren't read and encoded a second time. Images that
+        can't be read are logged and removed from the chunk in place.
+        """
+        readable = []
+        for chapter, img in chunk:
+            if not img.get("remote_url") and "data_uri" not in img:
+                try:
+                    img["data_uri"] = _load_data_uri(img["path"])
+                except OSError as e:
+                    logger.error(f"Error reading image {img['path']}: {e}")
+                    continue
+            readable.append((chapter, img))
+        chunk[:] = readable
+        return self._build_chunk_body(chunk)
+
+    def _build_chunk_messages(self, content: list) -> list:
+        """Wrap chunk content with the narration system prompt."""
+        return [
+            self.SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+
     async def process_batch(
         self,
         task_id: str,
         batch_number: int,
         chapter_images: Dict[str, List[dict]],
         manga_title: str,
-        progress_callback: Optional[Callable] = None
-    ) -> str:
+        progress_callback: Optional[Callable] = None,
+        parallel: Optional[bool] = None
+    ) -> List[Path]:
         """
         Process a batch of chapter images with Qwen3-VL.
         Processes ALL images by splitting into chunks of 20 images per API call.
-        chapter_images: {chapter_number: [{path, base64, media_type}, ...], ...}
-        Returns Vietnamese script text.
+        chapter_images: {chapter_number: [{path[, remote_url]}, ...], ...} in
+        story order - the scraper sorts chapters by number once per crawl and
+        batches keep that order, so they aren't re-sorted here.
+        Images are read and base64-encoded only when their chunk is built,
+        so at most a few chunks' worth of data URIs are in memory at once.
+        Each chunk's script is streamed to content/{task_id}/_staging/; returns
+        the chunk files in story order for save_script to concatenate.
+        parallel overrides AI_PARALLEL_CHUNKS for this batch: True sends every
+        chunk at once (no text context between chunks), False keeps the
+        story-state chain.
         """
         IMAGES_PER_REQUEST = 20  # API limit is 30, use 20 for safety
 
         # Get chapter range
-        chapters = sorted(chapter_images.keys(), key=lambda x: float(x) if x.replace(".", "").isdigit() else 0)
+        chapters = list(chapter_images)
         if chapters:
             chapter_range = f"{chapters[0]} - {chapters[-1]}"
         else:
             chapter_range = f"Batch {batch_number}"
 
-        # Flatten all images with chapter info
-        all_images = []
-        for chapter_num in chapters:
-            for img in chapter_images[chapter_num]:
-                all_images.append({
-                    "chapter": chapter_num,
-                    "image": img
-                })
+        # Flatten all images as (chapter, image) pairs
+        all_images = [
+            (chapter_num, img)
+            for chapter_num in chapters
+            for img in chapter_images[chapter_num]
+        ]
 
         total_images = len(all_images)
         logger.info(f"Processing AI batch {batch_number} for chapters {chapter_range} with {total_images} total images")
 
         if total_images == 0:
-            return "Không có hình ảnh để xử lý."
+            return []
 
         # Split into chunks of IMAGES_PER_REQUEST
         chunks = []
@@ -225,186 +796,391 @@ TIẾP TỤC CÂU CHUYỆN:
 
         logger.info(f"Split into {len(chunks)} API calls of up to {IMAGES_PER_REQUEST} images each")
 
-        # Process each chunk with context passing
-        all_scripts = []
+        staging_path = self._staging_path(task_id, batch_number)
+        await asyncio.to_thread(staging_path.mkdir, parents=True, exist_ok=True)
+
+        if parallel is None:
+            parallel = settings.ai_parallel_chunks
+
+        # Production crawls are non-interactive, so the Batch API's latency
+        # is an acceptable price for its lower cost and separate rate limits
+        use_batch_api = settings.ai_batch_api and settings.environment != "development"
+
+        if use_batch_api and len(chunks) > 1:
+            chunk_files = await self._process_chunks_batch_api(chunks, manga_title, staging_path, progress_callback)
+        elif parallel and len(chunks) > 1:
+            chunk_files = await self._process_chunks_parallel(chunks, manga_title, staging_path, progress_callback)
+        else:
+            chunk_files = await self._process_chunks_sequential(chunks, manga_title, staging_path, progress_callback)
+
+        logger.info(f"Generated {len(chunk_files)}/{len(chunks)} chunk scripts for batch {batch_number}")
+
+        return chunk_files
+
+    def _staging_path(self, task_id: str, batch_number: int) -> Path:
+        """Directory holding a batch's per-chunk scripts until save_script joins them."""
+        return self.content_path / task_id / "_staging" / f"batch_{batch_number:03d}"
+
+    async def _process_chunks_sequential(
+        self,
+        chunks: List[List[Tuple[str, dict]]],
+        manga_title: str,
+        staging_path: Path,
+        progress_callback: Optional[Callable] = None
+    ) -> List[Path]:
+        """Process chunks one after another, passing story state from each chunk to the next."""
+        chunk_files = []
         story_state = ""  # Structured story state for context
         last_paragraph = ""  # Last paragraph for smooth transition
-        previous_images = []  # Store last 5 images from previous chunk
+        # Last AI_CONTEXT_IMAGES images seen; the deque drops older ones itself
+        previous_images = deque(maxlen=settings.ai_context_images)
+        body = await asyncio.to_thread(self._prepare_chunk_body, chunks[0])
 
         for chunk_idx, chunk in enumerate(chunks):
             chunk_num = chunk_idx + 1
             logger.info(f"Processing chunk {chunk_num}/{len(chunks)} with {len(chunk)} images")
 
-            # Build content for story generation
-            content = []
+            # Double-buffer: build the next chunk's image parts off the loop
+            # while this chunk's request is in flight
+            next_body = None
+            state_task = None
+            if chunk_num < len(chunks):
+                next_body = asyncio.create_task(asyncio.to_thread(self._prepare_chunk_body, chunks[chunk_num]))
+            try:
+                content = self._build_chunk_content(
+                    chunk, chunk_idx, manga_title, story_state, last_paragraph, previous_images, body
+                )
 
-            if chunk_idx == 0:
-                # First chunk - use base prompt
-                prompt = self._build_prompt(manga_title, "")
-                content.append({
-                    "type": "text",
-                    "text": prompt
-                })
-            else:
-                # Continuation chunks - add structured story state context
-                prompt = self._build_continuation_prompt_with_state(
-                    manga_title,
-                    story_state,
-                    last_paragraph
+                sent_context = list(previous_images)
+                chunk_file = staging_path / f"chunk_{chunk_num:03d}.txt"
+                try:
+                    written, tail = await self._call_chunk_api(content, chunk_file)
+                    chunk_files.append(chunk_file)
+                    logger.info(f"Chunk {chunk_num} generated {written} characters")
+
+                    # Extract structured story state for next chunk (only if more chunks remain).
+                    # It's another API round trip, so it runs in the background while
+                    # the rest of this iteration (progress, cleanup, next body) proceeds.
+                    if chunk_idx < len(chunks) - 1:
+                        logger.info(f"Extracting story state for chunk {chunk_num}...")
+                        state_task = asyncio.create_task(self._extract_story_state(tail, story_state))
+
+                        # Extract last paragraph for smooth transition
+                        paragraphs = [p.strip() for p in tail.split('\n\n') if p.strip()]
+                        if paragraphs:
+                            # Get last 2 paragraphs for better context
+                            last_paragraph = '\n\n'.join(paragraphs[-2:]) if len(paragraphs) >= 2 else paragraphs[-1]
+                            # Limit length
+                            last_paragraph = _tail_by_sentences(last_paragraph, 500)
+
+                    if progress_callback:
+                        await progress_callback(chunk_num, len(chunks))
+
+                except Exception as e:
+                    logger.error(f"AI processing error for chunk {chunk_num}: {e}")
+                    logger.warning(f"Skipping chunk {chunk_num} due to error")
+                    chunk_file.unlink(missing_ok=True)
+
+                # Store context for next chunk (kept even if this chunk failed)
+                previous_images.extend(img for _, img in chunk)
+
+                # This chunk's request is done: free the data URIs of every image
+                # that is no longer in the context window
+                keep = {id(img) for img in previous_images}
+                self._release_images(
+                    img for img in chain(sent_context, (img for _, img in chunk))
+                    if id(img) not in keep
                 )
-                content.append({
-                    "type": "text",
-                    "text": prompt
-                })
-
-                # Add last 5 images from previous chunk for visual continuity
-                if previous_images:
-                    content.append({
-                        "type": "text",
-                        "text": "\n[HÌNH ẢNH CUỐI TỪ PHẦN TRƯỚC - để nhận diện nhân vật]:\n"
-                    })
-                    for img in previous_images[-5:]:
-                        content.append({
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{img['media_type']};base64,{img['base64']}"
-                            }
-                        })
-                    content.append({
-                        "type": "text",
-                        "text": "\n[HÌNH ẢNH MỚI - tiếp tục kể từ đây]:\n"
-                    })
-
-            # Track current chapter for headers
-            current_chapter = None
-
-            for item in chunk:
-                # Add chapter header when chapter changes
-                if item["chapter"] != current_chapter:
-                    current_chapter = item["chapter"]
-                    content.append({
-                        "type": "text",
-                        "text": f"\n--- CHƯƠNG {current_chapter} ---\n"
-                    })
-
-                # Add image
-                img = item["image"]
-                content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:{img['media_type']};base64,{img['base64']}"
-                    }
-                })
-
-            # Build messages with improved system prompt
-            messages = [
-                {
-                    "role": "system",
-                    "content": self.SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": content
+
+                if next_body is not None:
+                    body = await next_body
+                if state_task is not None:
+                    story_state = await state_task
+            finally:
+                # Cancelled (or failed) mid-iteration: don't leave the next body
+                # or the story-state call running unawaited
+                for task in (next_body, state_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+
+        return chunk_files
+
+    @staticmethod
+    def _context_images(chunk: List[Tuple[str, dict]]) -> List[dict]:
+        """The last AI_CONTEXT_IMAGES images of a chunk, re-sent with the next chunk."""
+        start = max(0, len(chunk) - settings.ai_context_images)
+        return [img for _, img in chunk[start:]]
+
+    @staticmethod
+    def _release_images(images) -> None:
+        """Drop inline data URIs that no request will send again."""
+        for img in images:
+            img.pop("data_uri", None)
+
+    def _build_independent_content(
+        self,
+        chunks: List[List[Tuple[str, dict]]],
+        chunk_idx: int,
+        manga_title: str
+    ) -> list:
+        """
+        Content for one chunk of the parallel and Batch API paths: continuation
+        chunks get the previous chunk's last images but no story state. Data
+        URIs live only in the returned content (blocking: reads the images).
+        """
+        return self._build_chunk_content(
+            chunks[chunk_idx],
+            chunk_idx,
+            manga_title,
+            previous_images=self._context_images(chunks[chunk_idx - 1]) if chunk_idx > 0 else None
+        )
+
+    async def _process_chunks_batch_api(
+        self,
+        chunks: List[List[Tuple[str, dict]]],
+        manga_title: str,
+        staging_path: Path,
+        progress_callback: Optional[Callable] = None
+    ) -> List[Path]:
+        """
+        Narrate all chunks of a batch as one Batch API job (half price, its
+        own rate-limit pool, up to 24h). Chunks are independent as in the
+        parallel path, which is also the fallback if the job fails.
+        """
+        # The job's input file needs every chunk, so all are encoded up front
+        contents = await asyncio.to_thread(
+            lambda: [self._build_independent_content(chunks, i, manga_title) for i in range(len(chunks))]
+        )
+        try:
+            results = await self._run_batch_job("chunk", {
+                f"chunk_{chunk_idx + 1}": {
+                    "model": settings.qwen_model,
+                    "messages": self._build_chunk_messages(content),
+                    "max_tokens": 8000,
+                    "temperature": 0.7,
                 }
-            ]
+                for chunk_idx, content in enumerate(contents)
+            })
+        except Exception as e:
+            logger.error(f"Chunk batch failed, falling back to direct calls: {e}")
+
+            async def prebuilt(chunk_idx: int) -> list:
+                content = contents[chunk_idx]
+                contents[chunk_idx] = None
+                return content
+
+            return await self._run_chunk_contents(len(chunks), prebuilt, staging_path, progress_callback)
+        # The input file is sent; release the encoded images before writing results
+        contents = None
+
+        chunk_files = []
+        for chunk_idx in range(len(chunks)):
+            script = results.get(f"chunk_{chunk_idx + 1}")
+            if script is None:
+                logger.warning(f"Skipping chunk {chunk_idx + 1}: no result in batch output")
+                continue
+            chunk_file = staging_path / f"chunk_{chunk_idx + 1:03d}.txt"
+            await asyncio.to_thread(chunk_file.write_text, script, encoding="utf-8")
+            chunk_files.append(chunk_file)
+
+        if progress_callback:
+            await progress_callback(len(chunks), len(chunks))
+        return chunk_files
+
+    async def _process_chunks_parallel(
+        self,
+        chunks: List[List[Tuple[str, dict]]],
+        manga_title: str,
+        staging_path: Path,
+        progress_callback: Optional[Callable] = None
+    ) -> List[Path]:
+        """
+        Process all chunks concurrently (bounded by ai_max_concurrency).
+        Continuation chunks still get the previous chunk's last images for
+        character continuity, but no text story state since the previous
+        chunk's output isn't known yet. Results keep the original chunk order.
+        """
+        return await self._run_chunk_contents(
+            len(chunks),
+            lambda chunk_idx: asyncio.to_thread(self._build_independent_content, chunks, chunk_idx, manga_title),
+            staging_path,
+            progress_callback
+        )
 
-            try:
-                script = await self._call_ai_api(messages)
-                all_scripts.append(script)
-                logger.info(f"Chunk {chunk_num} generated {len(script)} characters")
-
-                # Store context for next chunk
-                previous_images = [item["image"] for item in chunk]
-
-                # Extract structured story state for next chunk (only if more chunks remain)
-                if chunk_idx < len(chunks) - 1:
-                    logger.info(f"Extracting story state for chunk {chunk_num}...")
-                    story_state = await self._extract_story_state(script)
-
-                    # Extract last paragraph for smooth transition
-                    paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
-                    if paragraphs:
-                        # Get last 2 paragraphs for better context
-                        last_paragraph = '\n\n'.join(paragraphs[-2:]) if len(paragraphs) >= 2 else paragraphs[-1]
-                        # Limit length
-                        if len(last_paragraph) > 500:
-                            last_paragraph = last_paragraph[-500:]
-
-                if progress_callback:
-                    await progress_callback(chunk_num, len(chunks))
-
-            except Exception as e:
-                logger.error(f"AI processing error for chunk {chunk_num}: {e}")
-                logger.warning(f"Skipping chunk {chunk_num} due to error")
-                # Keep previous context even if this chunk fails
-                previous_images = [item["image"] for item in chunk]
-
-        # Combine all scripts
-        combined_script = "\n\n".join(all_scripts)
-        logger.info(f"Generated combined script with {len(combined_script)} characters from {len(chunks)} chunks")
-
-        return combined_script
+    async def _run_chunk_contents(
+        self,
+        count: int,
+        get_content: Callable[[int], Awaitable[list]],
+        staging_path: Path,
+        progress_callback: Optional[Callable] = None
+    ) -> List[Path]:
+        """
+        Send count chunks concurrently; failed chunks are skipped. Contents
+        come from get_content(chunk_idx) only once the chunk holds one of
+        ai_max_concurrency slots, which bounds the data URIs in memory.
+        """
+        completed = 0
+        slots = asyncio.Semaphore(settings.ai_max_concurrency)
+
+        async def process_one(chunk_idx: int) -> Path:
+            nonlocal completed
+            chunk_file = staging_path / f"chunk_{chunk_idx + 1:03d}.txt"
+            async with slots:
+                content = await get_content(chunk_idx)
+                try:
+                    written, _ = await self._call_chunk_api(content, chunk_file)
+                except BaseException:
+                    chunk_file.unlink(missing_ok=True)
+                    raise
+                finally:
+                    del content
+            logger.info(f"Chunk {chunk_idx + 1} generated {written} characters")
+
+            completed += 1
+            if progress_callback:
+                await progress_callback(completed, count)
+            return chunk_file
+
+        logger.info(f"Processing {count} chunks in parallel (max {settings.ai_max_concurrency} concurrent)")
+        results = await asyncio.gather(
+            *(process_one(i) for i in range(count)),
+            return_exceptions=True
+        )
+
+        chunk_files = []
+        for chunk_idx, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error(f"AI processing error for chunk {chunk_idx + 1}: {result}")
+                logger.warning(f"Skipping chunk {chunk_idx + 1} due to error")
+                continue
+            chunk_files.append(result)
+        return chunk_files
+
+    # Script file headers; the fixed text is parsed once, only the fields vary
+    BATCH_HEADER_TEMPLATE = Template("""================================================================================
+CÂU CHUYỆN MANGA
+================================================================================
+Task ID: $task_id
+Batch: $batch_number
+Chapters: $chapter_range
+Generated: $generated
+================================================================================
+
+""")
+    FULL_SCRIPT_HEADER_TEMPLATE = Template("""================================================================================
+CÂU CHUYỆN MANGA - BẢN ĐẦY ĐỦ
+================================================================================
+Manga: $manga_title
+Task ID: $task_id
+Generated: $generated
+Total Batches: $total_batches
+================================================================================
+
+""")
 
     async def save_script(
         self,
         task_id: str,
         batch_number: int,
-        script_content: str,
+        chunk_files: List[Path],
         chapter_range: str
     ) -> str:
         """
-        Save script to content/{task_id}/batch_{n}_script.txt
+        Save script to content/{task_id}/batch_{n}_script.txt by concatenating
+        the staged chunk files from process_batch, then drop the staging dir.
         Returns file path.
         """
         task_path = self.content_path / task_id
-        task_path.mkdir(parents=True, exist_ok=True)
-
-        filename = f"batch_{batch_number:03d}_chapters_{chapter_range.replace(' ', '_').replace('-', 'to')}.txt"
+        filename = f"batch_{batch_number:03d}_chapters_{chapter_range.translate(_CHAPTER_RANGE_TRANS)}.txt"
         file_path = task_path / filename
 
         # Add header to script
-        header = f"""================================================================================
-CÂU CHUYỆN MANGA
-================================================================================
-Task ID: {task_id}
-Batch: {batch_number}
-Chapters: {chapter_range}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-================================================================================
-
-"""
-        full_content = header + script_content
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(full_content)
+        header = self.BATCH_HEADER_TEMPLATE.substitute(
+            task_id=task_id,
+            batch_number=batch_number,
+            chapter_range=chapter_range,
+            generated=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        # File I/O runs in a worker thread so it doesn't stall other tasks on the loop
+        await asyncio.to_thread(
+            self._write_script_sync,
+            file_path,
+            header,
+            chunk_files,
+            self._staging_path(task_id, batch_number)
+        )
 
         logger.info(f"Saved script to {file_path}")
         return str(file_path)
 
-    def _remove_duplicate_sentences(self, text: str) -> str:
-        """Remove duplicate sentences from text, keeping first occurrence."""
-        # Split into sentences (keeping punctuation)
-        sentences = re.split(r'([.!?]+)', text)
+    def _write_script_sync(
+        self,
+        file_path: Path,
+        header: str,
+        chunk_files: List[Path],
+        staging_path: Path
+    ) -> None:
+        """Blocking part of save_script: concatenate chunk files, remove staging dir."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(header)
+            if not chunk_files:
+                f.write("Không có hình ảnh để xử lý.")
+            for i, chunk_file in enumerate(chunk_files):
+                if i:
+                    f.write("\n\n")
+                with open(chunk_file, "r", encoding="utf-8") as src:
+                    shutil.copyfileobj(src, f)
+
+        shutil.rmtree(staging_path, ignore_errors=True)
+        try:
+            staging_path.parent.rmdir()  # Only succeeds once no other batch is staged
+        except OSError:
+            pass
 
+    def _remove_duplicate_sentences(self, text: str) -> str:
+        """
+        Remove duplicate sentences from text, keeping first occurrence.
+        Single pass over the text; seen sentences are kept as 64-bit xxh3 ints
+        of their normalized form rather than full strings. A kept sentence is
+        preceded by the strongest break (paragraph, line, space) found in the
+        source since the previous kept sentence, so paragraphs survive.
+        """
         seen_sentences = set()
         cleaned_parts = []
-
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i].strip()
-            punct = sentences[i + 1] if i + 1 < len(sentences) else ""
-
-            if sentence:
-                # Normalize for comparison (lowercase, remove extra spaces)
-                normalized = re.sub(r'\s+', ' ', sentence.lower().strip())
-
-                if normalized not in seen_sentences:
-                    seen_sentences.add(normalized)
-                    cleaned_parts.append(sentence + punct)
-
-            i += 2 if punct else 1
-
-        return " ".join(cleaned_parts)
+        pending_break = 0  # Index into _SENTENCE_BREAKS
+        # Locals for the hot loop (tens of thousands of sentences per script)
+        seen_add = seen_sentences.add
+        append = cleaned_parts.append
+        ws_sub = _WS_RE.sub
+        xxh3 = xxhash.xxh3_64_intdigest
+
+        for raw, punct in _SENTENCE_RE.findall(text):
+            sentence = raw.strip()
+            if not sentence:
+                continue
+
+            # Only sentences starting a line carry leading whitespace worth checking
+            lead_end = raw.find(sentence[0])
+            if lead_end:
+                if raw.find("\n\n", 0, lead_end) != -1:
+                    pending_break = 2
+                elif pending_break < 1 and raw.find("\n", 0, lead_end) != -1:
+                    pending_break = 1
+
+            # Normalize for comparison (lowercase, collapse whitespace)
+            digest = xxh3(ws_sub(" ", sentence.lower()).encode())
+            if digest in seen_sentences:
+                continue
+            seen_add(digest)
+
+            if cleaned_parts:
+                append(_SENTENCE_BREAKS[pending_break])
+            pending_break = 0
+            append(sentence)
+            append(punct)
+
+        return "".join(cleaned_parts)
 
     REFINE_SYSTEM_PROMPT = """Bạn là biên tập viên chuyên nghiệp. Nhiệm vụ: chỉnh sửa và hoàn thiện câu chuyện manga.
 
@@ -434,6 +1210,7 @@ TUYỆT ĐỐI KHÔNG ĐƯỢC:
 - Thay đổi cốt truyện
 
 CHỈ TRẢ VỀ TRUYỆN ĐÃ CHỈNH SỬA, KHÔNG VIẾT GÌ THÊM."""
+    REFINE_SYSTEM_MESSAGE = {"role": "system", "content": REFINE_SYSTEM_PROMPT}
 
     async def refine_script(self, script_content: str, manga_title: str) -> str:
         """
@@ -448,54 +1225,150 @@ CHỈ TRẢ VỀ TRUYỆN ĐÃ CHỈNH SỬA, KHÔNG VIẾT GÌ THÊM."""
 
         logger.info(f"Starting script refinement for '{manga_title}' ({len(script_content)} chars)")
 
-        # For very long scripts, process in chunks to avoid token limits
-        MAX_CHARS_PER_CALL = 15000
+        # For very long scripts, process in chunks to avoid token limits.
+        # Tokenizing is CPU work, so the split runs in a worker thread.
+        chunks = await asyncio.to_thread(
+            self._split_for_refinement, script_content, settings.ai_refine_chunk_tokens
+        )
 
-        if len(script_content) <= MAX_CHARS_PER_CALL:
+        if len(chunks) <= 1:
             # Process entire script in one call
             refined = await self._refine_chunk(script_content, manga_title)
         else:
-            # Split into chunks at paragraph boundaries
-            chunks = self._split_for_refinement(script_content, MAX_CHARS_PER_CALL)
             logger.info(f"Script too long, splitting into {len(chunks)} chunks for refinement")
 
-            refined_chunks = []
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Refining chunk {i + 1}/{len(chunks)}")
-                refined_chunk = await self._refine_chunk(chunk, manga_title)
-                refined_chunks.append(refined_chunk)
+            refined_chunks = None
+            if settings.ai_refine_batch_api:
+                try:
+                    refined_chunks = await self._refine_chunks_batch(chunks, manga_title)
+                except Exception as e:
+                    logger.error(f"Batch refinement failed, falling back to direct calls: {e}")
+
+            if refined_chunks is None:
+                # Chunks are refined independently, so send them all at once; the
+                # dispatcher caps how many are in flight. gather keeps the order and
+                # _refine_chunk already falls back to the original text on errors.
+                refined_chunks = await asyncio.gather(
+                    *(self._refine_chunk(chunk, manga_title) for chunk in chunks)
+                )
 
             refined = "\n\n".join(refined_chunks)
 
         logger.info(f"Refinement complete: {len(script_content)} -> {len(refined)} chars")
         return refined
 
-    def _split_for_refinement(self, text: str, max_chars: int) -> list:
-        """Split text into chunks at paragraph boundaries."""
-        paragraphs = text.split("\n\n")
+    def _split_for_refinement(self, text: str, max_tokens: int) -> list:
+        """
+        Split text into chunks of at most max_tokens at paragraph boundaries.
+        Each paragraph is tokenized once and the counts summed (plus one token
+        per separator) instead of re-encoding concatenations. Without the
+        tokenizer, paragraphs are counted as _CHARS_PER_TOKEN chars per token.
+        """
+        encoder = _token_encoder()
+        # Runs of blank lines count as one boundary, so no empty paragraphs
+        paragraphs = _PARA_SPLIT_RE.split(text)
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the chunk being built, joined once when it's full
+        current = []
+        current_tokens = 0
 
         for para in paragraphs:
-            if len(current_chunk) + len(para) + 2 <= max_chars:
-                current_chunk += ("\n\n" if current_chunk else "") + para
+            if not para:
+                continue
+            if encoder is not None:
+                para_tokens = len(encoder.encode_ordinary(para))
             else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = para
-
-        if current_chunk:
-            chunks.append(current_chunk)
+                para_tokens = -(-len(para) // _CHARS_PER_TOKEN)  # ceil
+            added = para_tokens + (1 if current else 0)
+            if current and current_tokens + added > max_tokens:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+                added = para_tokens
+            current.append(para)
+            current_tokens += added
+
+        if current:
+            chunks.append("\n\n".join(current))
 
         return chunks
 
-    async def _refine_chunk(self, chunk: str, manga_title: str) -> str:
-        """Refine a single chunk of the script."""
-        messages = [
-            {
-                "role": "system",
-                "content": self.REFINE_SYSTEM_PROMPT
-            },
+    # Terminal states of an OpenAI-compatible batch job
+    BATCH_DONE_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+    async def _refine_chunks_batch(self, chunks: List[str], manga_title: str) -> List[str]:
+        """
+        Refine all chunks through the provider's Batch API (cheaper, higher
+        limits, no latency guarantee). Chunks missing from the output keep
+        their original text; raises if the batch job itself fails.
+        """
+        refined = await self._run_batch_job("refine", {
+            f"refine_{i}": {
+                "model": settings.qwen_model,
+                "messages": self._build_refine_messages(chunk, manga_title),
+                "max_tokens": 16000,
+                "temperature": 0.3,
+            }
+            for i, chunk in enumerate(chunks)
+        })
+        return [refined.get(f"refine_{i}", chunk) for i, chunk in enumerate(chunks)]
+
+    async def _run_batch_job(self, name: str, bodies: Dict[str, dict]) -> Dict[str, str]:
+        """
+        Run chat completion request bodies, keyed by custom_id, as one
+        OpenAI-compatible batch job. Returns the response text of every
+        request that succeeded; raises if the job itself doesn't complete.
+        """
+        lines = [
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            })
+            for custom_id, body in bodies.items()
+        ]
+        input_file = await self.client.files.create(
+            file=(f"{name}.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        del lines
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted {name} batch {batch.id} with {len(bodies)} requests")
+
+        # Poll with exponential backoff, capped at 5 minutes between checks
+        delay = 5.0
+        while batch.status not in self.BATCH_DONE_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300.0)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"{name} batch {batch.id} ended with status {batch.status}")
+
+        output = await self.client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.warning(f"{name} batch item {record.get('custom_id')} failed")
+                continue
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+        logger.info(f"{name} batch {batch.id} completed: {len(results)}/{len(bodies)} succeeded")
+        return results
+
+    def _build_refine_messages(self, chunk: str, manga_title: str) -> list:
+        """Messages for refining one chunk of the script."""
+        return [
+            self.REFINE_SYSTEM_MESSAGE,
             {
                 "role": "user",
                 "content": f"""Chỉnh sửa và hoàn thiện đoạn truyện manga "{manga_title}" sau đây:
@@ -508,18 +1381,33 @@ Trả về bản đã chỉnh sửa:"""
             }
         ]
 
+    async def _refine_chunk(self, chunk: str, manga_title: str) -> str:
+        """Refine a single chunk of the script."""
+        messages = self._build_refine_messages(chunk, manga_title)
+
         try:
-            response = await self.client.chat.completions.create(
-                model=settings.qwen_model,
-                messages=messages,
-                max_tokens=16000,
-                temperature=0.3,  # Lower temperature for more consistent editing
-            )
-            return response.choices[0].message.content
+            # Lower temperature for more consistent editing
+            return await self._call_ai_api(messages, max_tokens=16000, temperature=0.3)
         except Exception as e:
             logger.error(f"Refinement API error: {e}")
             return chunk  # Return original if refinement fails
 
+    SCRIPT_HEADER_END = "=" * 80 + "\n\n"
+
+    def _read_script_body(self, script_file: Path) -> str:
+        """Read a batch script without the header written by save_script."""
+        with open(script_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        sep = self.SCRIPT_HEADER_END
+        end = content.find(sep)
+        if end == -1:
+            return content
+        # Same as split(sep, 2)[-1], without copying the pieces in between
+        second = content.find(sep, end + len(sep))
+        if second != -1:
+            end = second
+        return content[end + len(sep):]
+
     async def combine_scripts(self, task_id: str, manga_title: str) -> tuple[str, str]:
         """
         Combine all batch scripts into a single final script.
@@ -527,48 +1415,61 @@ Trả về bản đã chỉnh sửa:"""
         """
         task_path = self.content_path / task_id
 
-        if not task_path.exists():
-            return "", ""
-
         # Get all batch script files
-        script_files = sorted(task_path.glob("batch_*.txt"))
+        script_files = await asyncio.to_thread(self._list_batch_scripts, task_path)
 
         if not script_files:
             return "", ""
 
-        # Combine raw content (for TTS - no metadata header)
-        raw_content = ""
-        for script_file in script_files:
-            with open(script_file, "r", encoding="utf-8") as f:
-                content = f.read()
-                # Skip the header from individual batch files
-                if "================================================================================\n\n" in content:
-                    content = content.split("================================================================================\n\n", 2)[-1]
-                raw_content += content + "\n\n"
+        # Batch files are read concurrently in worker threads; each strips
+        # its header with a single find()
+        bodies = await asyncio.gather(
+            *(asyncio.to_thread(self._read_script_body, f) for f in script_files)
+        )
+
+        # Deduplicating and writing run in one more worker thread hop
+        return await asyncio.to_thread(
+            self._write_combined_sync, task_id, manga_title, task_path, bodies
+        )
+
+    @staticmethod
+    def _list_batch_scripts(task_path: Path) -> List[Path]:
+        """Sorted batch script files of a task (empty if the task has none)."""
+        if not task_path.exists():
+            return []
+        return sorted(task_path.glob("batch_*.txt"))
+
+    def _write_combined_sync(
+        self,
+        task_id: str,
+        manga_title: str,
+        task_path: Path,
+        bodies: List[str]
+    ) -> tuple[str, str]:
+        """Blocking part of combine_scripts: dedup the bodies and write the full script."""
+        # Combine raw content (for TTS - no metadata header), joined once
+        # rather than growing a string per batch
+        raw_content = "\n\n".join(bodies) + "\n\n"
 
         # Remove duplicate sentences
         raw_content = self._remove_duplicate_sentences(raw_content)
         logger.info(f"Removed duplicate sentences, final length: {len(raw_content)} characters")
 
         # Create formatted content with metadata header (for human reading)
-        header = f"""================================================================================
-CÂU CHUYỆN MANGA - BẢN ĐẦY ĐỦ
-================================================================================
-Manga: {manga_title}
-Task ID: {task_id}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Total Batches: {len(script_files)}
-================================================================================
-
-"""
-        formatted_content = header + raw_content
+        header = self.FULL_SCRIPT_HEADER_TEMPLATE.substitute(
+            manga_title=manga_title,
+            task_id=task_id,
+            generated=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            total_batches=len(bodies)
+        )
 
         # Save combined file with header
         combined_path = task_path / f"{manga_title.replace(' ', '_')}_full_script.txt"
         with open(combined_path, "w", encoding="utf-8") as f:
-            f.write(formatted_content)
+            f.write(header)
+            f.write(raw_content)
 
-        logger.info(f"Combined {len(script_files)} scripts into {combined_path}")
+        logger.info(f"Combined {len(bodies)} scripts into {combined_path}")
         return str(combined_path), raw_content.strip()
 
 
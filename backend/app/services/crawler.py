@@ -3,19 +3,22 @@
 import asyncio
 import logging
 import shutil
+import time
+from collections import deque
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Any, Awaitable, Optional, List, Dict
 from bson import ObjectId
+from bson.errors import InvalidId
 
-from ..database import Database
-from ..config import get_settings
+from ..database import database
+from ..config import settings
 from ..models.crawler import (
     CrawlerTask,
     CrawlerTaskCreate,
-    ChapterInfo,
     ProgressEvent,
     TaskStatus,
+    chapter_list_adapter,
+    utc_now,
 )
 from ..utils.event_bus import event_bus
 from .scraper import scraper
@@ -25,20 +28,117 @@ from .video_generator import video_generator
 from .youtube_uploader import youtube_uploader
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Returned by CrawlerService._unless_cancelled when the task was cancelled first
+_CANCELLED = object()
+
+
+class _TaskUpdateBuffer:
+    """
+    Coalesces a task's frequent progress counters into one $set/$inc write
+    per flush_interval (debounced: fields merged between writes are written
+    flush_interval after the last one at the latest). Status changes are
+    written directly by the caller, after a flush(), so buffered fields
+    never overwrite newer state.
+    """
+
+    __slots__ = ("task_id", "pending", "increments", "last_flush", "flush_interval", "_timer")
+
+    def __init__(self, task_id: str, flush_interval: float = 0.5):
+        self.task_id = task_id
+        self.pending: dict = {}
+        self.increments: Dict[str, int] = {}
+        self.last_flush = 0.0
+        self.flush_interval = flush_interval
+        self._timer: Optional[asyncio.Task] = None
+
+    def merge(self, updates: dict) -> None:
+        """Queue fields for the next write; later values win."""
+        self.pending.update(updates)
+
+    def increment(self, deltas: Dict[str, int]) -> None:
+        """Queue counter deltas for the next write ($inc); deltas add up."""
+        for key, delta in deltas.items():
+            self.increments[key] = self.increments.get(key, 0) + delta
+
+    async def maybe_flush(self) -> None:
+        """
+        Write pending fields if flush_interval has passed since the last
+        write, else make sure a timer writes them when it has.
+        """
+        if not self.pending and not self.increments:
+            return
+        wait = self.last_flush + self.flush_interval - time.monotonic()
+        if wait <= 0:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Progress update for task {self.task_id} failed: {e}")
+
+    async def flush(self) -> None:
+        """Write all pending fields now (no-op if there are none)."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending and not self.increments:
+            return
+        updates, self.pending = self.pending, {}
+        increments, self.increments = self.increments, {}
+        self.last_flush = time.monotonic()
+        await CrawlerService.update_task(self.task_id, updates, increments)
 
 
 class CrawlerService:
     """Main orchestrator for manga crawling."""
 
     COLLECTION_NAME = "crawler_tasks"
-    _cancelled_tasks: set = set()
+    # Cancellation flags of the tasks running in this process; the task
+    # document's `cancelled` field carries cancellation across workers
+    _cancel_events: Dict[str, asyncio.Event] = {}
+    # Fire-and-forget cleanup tasks, kept referenced until done and
+    # awaited on shutdown
+    _background_tasks: set = set()
+
+    # Statuses in which a task can still be cancelled
+    CANCELLABLE_STATUSES = frozenset({
+        TaskStatus.PENDING.value,
+        TaskStatus.CRAWLING_CHAPTERS.value,
+        TaskStatus.DOWNLOADING_IMAGES.value,
+        TaskStatus.PROCESSING_AI.value,
+    })
+    _CANCELLABLE_STATUS_LIST = sorted(CANCELLABLE_STATUSES)
+
+    # Listings only fetch the fields exposed by CrawlerTask (skips the chapter list)
+    LIST_PROJECTION = {
+        field.alias or name: 1 for name, field in CrawlerTask.model_fields.items()
+    }
+
+    # Collection handle, cached with the database handle it came from so a
+    # reconnect (new database object) picks up a fresh one
+    _collection = None
+    _collection_db = None
 
     @classmethod
     def _get_collection(cls):
         """Get the crawler tasks collection."""
-        db = Database.get_database()
-        return db[cls.COLLECTION_NAME]
+        if cls._collection is None or cls._collection_db is not database.db:
+            cls._collection = database.get_collection(cls.COLLECTION_NAME)
+            cls._collection_db = database.db
+        return cls._collection
+
+    @classmethod
+    async def ensure_indexes(cls):
+        """Create the indexes used by task listings."""
+        collection = cls._get_collection()
+        await collection.create_index([("created_at", -1)])
+        await collection.create_index([("status", 1), ("created_at", -1)])
 
     @classmethod
     def _serialize_task(cls, task: dict) -> dict:
@@ -52,7 +152,7 @@ class CrawlerService:
         """Create a new crawl task."""
         collection = cls._get_collection()
 
-        now = datetime.utcnow()
+        now = utc_now()
         task_doc = {
             "manga_url": task_data.manga_url,
             "manga_title": None,
@@ -64,7 +164,11 @@ class CrawlerService:
             "batches_processed": 0,
             "total_batches": 0,
             "output_files": [],
+            "video_file": None,
+            "video_progress": 0,
+            "youtube_video_id": None,
             "error_message": None,
+            "cancelled": False,
             "chapters": [],
             "created_at": now,
             "updated_at": now,
@@ -88,21 +192,35 @@ class CrawlerService:
             return None
 
     @classmethod
-    async def get_all_tasks(cls) -> List[dict]:
-        """Get all tasks, sorted by creation date."""
+    async def task_exists(cls, task_id: str) -> bool:
+        """Check that a task exists (fetches only its _id)."""
         collection = cls._get_collection()
-        cursor = collection.find().sort("created_at", -1)
-        tasks = await cursor.to_list(length=100)
-        return [cls._serialize_task(task) for task in tasks]
+        try:
+            task = await collection.find_one({"_id": ObjectId(task_id)}, {"_id": 1})
+        except Exception:
+            return False
+        return task is not None
 
     @classmethod
-    async def update_task(cls, task_id: str, updates: dict):
-        """Update a task."""
+    async def get_all_tasks(cls, status: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Get tasks (optionally filtered by status), newest first."""
         collection = cls._get_collection()
-        updates["updated_at"] = datetime.utcnow()
+        query = {"status": status} if status else {}
+        cursor = collection.find(query, cls.LIST_PROJECTION).sort("created_at", -1).limit(limit)
+        # One awaited call for the whole result instead of one per document
+        return [cls._serialize_task(task) for task in await cursor.to_list()]
+
+    @classmethod
+    async def update_task(cls, task_id: str, updates: dict, increments: Optional[Dict[str, int]] = None):
+        """Update a task; increments are applied atomically with $inc."""
+        collection = cls._get_collection()
+        updates["updated_at"] = utc_now()
+        operations = {"$set": updates}
+        if increments:
+            operations["$inc"] = increments
         await collection.update_one(
             {"_id": ObjectId(task_id)},
-            {"$set": updates}
+            operations
         )
 
     @classmethod
@@ -130,7 +248,7 @@ class CrawlerService:
         """Cleanup content folder for a task."""
         content_path = Path(settings.content_dir) / task_id
         if content_path.exists():
-            shutil.rmtree(content_path)
+            await asyncio.to_thread(shutil.rmtree, content_path)
             logger.info(f"Cleaned up content folder for task {task_id}")
 
     @classmethod
@@ -138,23 +256,54 @@ class CrawlerService:
         """Cleanup videos folder for a task."""
         videos_path = Path(settings.videos_dir) / task_id
         if videos_path.exists():
-            shutil.rmtree(videos_path)
+            await asyncio.to_thread(shutil.rmtree, videos_path)
             logger.info(f"Cleaned up videos folder for task {task_id}")
 
+    @classmethod
+    def _run_in_background(cls, coro) -> None:
+        """Run a cleanup coroutine without making the caller wait for it."""
+        task = asyncio.create_task(coro)
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_done)
+
+    @classmethod
+    def _background_done(cls, task: asyncio.Task) -> None:
+        cls._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background cleanup failed: {task.exception()}")
+
+    @classmethod
+    async def wait_background_tasks(cls):
+        """Wait for pending cleanup tasks (called on app shutdown)."""
+        if cls._background_tasks:
+            await asyncio.gather(*cls._background_tasks, return_exceptions=True)
+
     @classmethod
     async def cancel_task(cls, task_id: str) -> bool:
-        """Cancel a running task."""
-        task = await cls.get_task(task_id)
-        if not task:
+        """
+        Cancel a running task. The status check and the update are one
+        conditional write, so a task can't finish between them.
+        """
+        try:
+            object_id = ObjectId(task_id)
+        except (InvalidId, TypeError):
             return False
 
-        if task["status"] not in [TaskStatus.PENDING.value, TaskStatus.CRAWLING_CHAPTERS.value,
-                                   TaskStatus.DOWNLOADING_IMAGES.value, TaskStatus.PROCESSING_AI.value]:
+        result = await cls._get_collection().update_one(
+            {"_id": object_id, "status": {"$in": cls._CANCELLABLE_STATUS_LIST}},
+            {"$set": {
+                "status": TaskStatus.CANCELLED.value,
+                "cancelled": True,
+                "updated_at": utc_now()
+            }}
+        )
+        if result.matched_count == 0:
             return False
 
-        cls._cancelled_tasks.add(task_id)
-        await cls.update_task(task_id, {"status": TaskStatus.CANCELLED.value})
-        await event_bus.publish(task_id, ProgressEvent(
+        event = cls._cancel_events.get(task_id)
+        if event is not None:
+            event.set()
+        event_bus.publish(task_id, ProgressEvent(
             task_id=task_id,
             event_type="task_failed",
             message="Task cancelled by user",
@@ -164,8 +313,52 @@ class CrawlerService:
 
     @classmethod
     def is_cancelled(cls, task_id: str) -> bool:
-        """Check if a task is cancelled."""
-        return task_id in cls._cancelled_tasks
+        """Check if a task is cancelled (in-process flag, no I/O)."""
+        event = cls._cancel_events.get(task_id)
+        return event is not None and event.is_set()
+
+    @classmethod
+    async def _sync_cancelled(cls, task_id: str) -> bool:
+        """
+        Check the task document for a cancel issued by another worker and
+        mirror it into the local flag. Called at batch boundaries only.
+        """
+        if cls.is_cancelled(task_id):
+            return True
+        task = await cls._get_collection().find_one(
+            {"_id": ObjectId(task_id)}, {"cancelled": 1}
+        )
+        if task and task.get("cancelled"):
+            cls._cancel_events[task_id].set()
+            return True
+        return False
+
+    @classmethod
+    async def _unless_cancelled(cls, task_id: str, work: Awaitable) -> Any:
+        """
+        Await work, but abandon (cancel) it as soon as the task's cancel event
+        is set, so a cancel doesn't wait out a long AI call or chapter fetch.
+        Returns work's result, or _CANCELLED if the task was cancelled first.
+        """
+        work = asyncio.ensure_future(work)
+        event = cls._cancel_events.get(task_id)
+        if event is None:
+            return await work
+        if event.is_set():
+            work.cancel()
+            return _CANCELLED
+        waiter = asyncio.create_task(event.wait())
+        try:
+            done, _ = await asyncio.wait({work, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            work.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if work in done:
+            return work.result()
+        work.cancel()
+        return _CANCELLED
 
     @classmethod
     async def _emit_progress(
@@ -174,9 +367,10 @@ class CrawlerService:
         event_type: str,
         message: str,
         progress: float,
-        data: Optional[dict] = None
+        data: Optional[dict] = None,
+        coalesce: bool = False
     ):
-        """Emit a progress event."""
+        """Emit a progress event (coalesce: only the latest per window is sent)."""
         event = ProgressEvent(
             task_id=task_id,
             event_type=event_type,
@@ -184,7 +378,7 @@ class CrawlerService:
             progress=progress,
             data=data
         )
-        await event_bus.publish(task_id, event)
+        event_bus.publish(task_id, event, coalesce=coalesce)
 
     @classmethod
     async def start_crawl(cls, task_id: str):
@@ -198,6 +392,7 @@ class CrawlerService:
 
         In development mode, only processes max_chapters_dev chapters.
         """
+        cls._cancel_events[task_id] = asyncio.Event()
         try:
             task = await cls.get_task(task_id)
             if not task:
@@ -230,7 +425,7 @@ class CrawlerService:
                 "manga_title": manga_title,
                 "total_chapters": total_chapters,
                 "total_batches": total_batches,
-                "chapters": [ChapterInfo(**ch, image_count=0).model_dump() for ch in chapters]
+                "chapters": chapter_list_adapter.dump_python(chapter_list_adapter.validate_python(chapters))
             })
 
             dev_note = " (dev mode)" if settings.environment == "development" else ""
@@ -242,79 +437,152 @@ class CrawlerService:
                 {"total_chapters": total_chapters, "manga_title": manga_title}
             )
 
-            if cls.is_cancelled(task_id):
+            if await cls._sync_cancelled(task_id):
                 return
 
             # Phase 2: Download images chapter by chapter and process in batches
             await cls.update_task(task_id, {"status": TaskStatus.DOWNLOADING_IMAGES.value})
 
-            batch_chapters: Dict[str, List[dict]] = {}
-            current_batch = 1
-            total_images_downloaded = 0
             output_files = []
+            # Downloading and AI processing overlap: the download loop queues
+            # each finished batch while the AI loop works on the previous one.
+            # maxsize bounds how far downloads may run ahead of the AI.
+            batch_queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+            downloads_done = False
+            # Per-chapter counters are written at most every 0.5s
+            progress = _TaskUpdateBuffer(task_id)
+
+            async def download_loop():
+                nonlocal downloads_done
+                batch_chapters: Dict[str, List[dict]] = {}
+                current_batch = 1
+                total_images_downloaded = 0  # For progress events; stored counters use $inc
+                cancelled = False
 
-            for i, chapter in enumerate(chapters):
-                if cls.is_cancelled(task_id):
-                    return
-
-                chapter_num = chapter["chapter_number"]
-                chapter_url = chapter["chapter_url"]
-
-                # Get image URLs for this chapter
-                await cls._emit_progress(
-                    task_id,
-                    "chapter_crawled",
-                    f"Processing chapter {chapter_num}...",
-                    10 + (i / total_chapters) * 40,
-                    {"chapter": chapter_num, "chapters_crawled": i + 1}
-                )
+                async def image_progress(downloaded, total):
+                    pass  # We'll batch update progress
 
-                image_urls = await scraper.get_chapter_images(chapter_url)
+                async def fetch_chapter(i: int, chapter: dict) -> Optional[List[str]]:
+                    """Scrape and download one chapter; None if it has no images."""
+                    if cls.is_cancelled(task_id):
+                        return None
+                    chapter_num = chapter["chapter_number"]
+                    chapter_url = chapter["chapter_url"]
 
-                if not image_urls:
-                    logger.warning(f"No images found for chapter {chapter_num}")
-                    continue
+                    # Get image URLs for this chapter
+                    await cls._emit_progress(
+                        task_id,
+                        "chapter_crawled",
+                        f"Processing chapter {chapter_num}...",
+                        10 + (i / total_chapters) * 40,
+                        {"chapter": chapter_num, "chapters_crawled": i + 1}
+                    )
 
-                # Download images
-                async def image_progress(downloaded, total):
-                    pass  # We'll batch update progress
+                    image_urls = await scraper.get_chapter_images(chapter_url)
 
-                downloaded_paths = await image_downloader.download_chapter_images(
-                    task_id,
-                    chapter_num,
-                    image_urls,
-                    chapter_url,
-                    image_progress
-                )
+                    if not image_urls:
+                        logger.warning(f"No images found for chapter {chapter_num}")
+                        return None
 
-                total_images_downloaded += len(downloaded_paths)
+                    # Download images
+                    return await image_downloader.download_chapter_images(
+                        task_id,
+                        chapter_num,
+                        image_urls,
+                        chapter_url,
+                        image_progress
+                    )
 
-                await cls.update_task(task_id, {
-                    "chapters_crawled": i + 1,
-                    "images_downloaded": total_images_downloaded,
-                    "total_images": total_images_downloaded  # Update as we go
-                })
+                # Up to chapter_download_concurrency chapters are fetched ahead
+                # and consumed in chapter order. New fetches start only as
+                # results are taken, so a full batch queue also pauses downloads.
+                fetches = deque()
+                next_fetch = 0
 
-                await cls._emit_progress(
-                    task_id,
-                    "image_downloaded",
-                    f"Downloaded {len(downloaded_paths)} images for chapter {chapter_num}",
-                    10 + ((i + 1) / total_chapters) * 40,
-                    {"chapter": chapter_num, "images": len(downloaded_paths), "total_downloaded": total_images_downloaded}
-                )
+                def schedule_fetches():
+                    nonlocal next_fetch
+                    while next_fetch < len(chapters) and len(fetches) < settings.chapter_download_concurrency:
+                        fetches.append(asyncio.create_task(fetch_chapter(next_fetch, chapters[next_fetch])))
+                        next_fetch += 1
 
-                # Load images for AI processing
-                chapter_images = await image_downloader.get_chapter_images_base64(task_id, chapter_num)
-                batch_chapters[chapter_num] = chapter_images
+                try:
+                    schedule_fetches()
+                    for i, chapter in enumerate(chapters):
+                        downloaded_paths = await cls._unless_cancelled(task_id, fetches.popleft())
+                        if downloaded_paths is _CANCELLED or cls.is_cancelled(task_id):
+                            return
+                        schedule_fetches()
+
+                        if downloaded_paths is None:
+                            continue
+
+                        chapter_num = chapter["chapter_number"]
+                        total_images_downloaded += len(downloaded_paths)
+
+                        # Image totals are incremented by this chapter's
+                        # count rather than overwritten with a running total.
+                        # The chapter's own entry is set by index, so Mongo
+                        # touches one array element rather than the list.
+                        progress.increment({
+                            "images_downloaded": len(downloaded_paths),
+                            "total_images": len(downloaded_paths)
+                        })
+                        progress.merge({
+                            "chapters_crawled": i + 1,
+                            f"chapters.{i}.image_count": len(downloaded_paths),
+                            f"chapters.{i}.images_downloaded": True
+                        })
+                        await progress.maybe_flush()
 
-                # Process batch every 50 chapters or at the end
-                if len(batch_chapters) >= settings.batch_size or i == len(chapters) - 1:
-                    if cls.is_cancelled(task_id):
-                        return
+                        await cls._emit_progress(
+                            task_id,
+                            "image_downloaded",
+                            f"Downloaded {len(downloaded_paths)} images for chapter {chapter_num}",
+                            10 + ((i + 1) / total_chapters) * 40,
+                            {"chapter": chapter_num, "images": len(downloaded_paths), "total_downloaded": total_images_downloaded}
+                        )
 
+                        # Collect image references for AI processing
+                        batch_chapters[chapter_num] = await image_downloader.image_refs(downloaded_paths)
+
+                        # Hand off a batch every batch_size chapters
+                        if len(batch_chapters) >= settings.batch_size:
+                            await batch_queue.put((current_batch, batch_chapters))
+                            batch_chapters = {}
+                            current_batch += 1
+
+                    # Whatever is left is the last batch (even if the final
+                    # chapters had no images)
+                    if batch_chapters:
+                        await batch_queue.put((current_batch, batch_chapters))
+                except asyncio.CancelledError:
+                    cancelled = True
+                    raise
+                finally:
+                    for fetch in fetches:
+                        fetch.cancel()
+                    downloads_done = True
+                    if not cancelled:
+                        # Final counters, also after a failed download
+                        try:
+                            await progress.flush()
+                        except Exception as e:
+                            logger.error(f"Progress update for task {task_id} failed: {e}")
+                    # End-of-batches marker; not needed (and it could block
+                    # on a full queue) when the AI loop is gone
+                    if not cancelled:
+                        await batch_queue.put(None)
+
+            async def ai_loop():
+                while (item := await batch_queue.get()) is not None:
+                    current_batch, batch_chapters = item
+                    if await cls._sync_cancelled(task_id):
+                        continue  # Drain until the download loop stops
+
+                    await progress.flush()
                     await cls.update_task(task_id, {"status": TaskStatus.PROCESSING_AI.value})
 
-                    chapter_range = f"{list(batch_chapters.keys())[0]}-{list(batch_chapters.keys())[-1]}"
+                    chapter_range = f"{next(iter(batch_chapters))}-{next(reversed(batch_chapters))}"
                     await cls._emit_progress(
                         task_id,
                         "batch_processing",
@@ -325,18 +593,20 @@ class CrawlerService:
 
                     try:
                         # Process with AI
-                        script = await ai_processor.process_batch(
+                        chunk_files = await cls._unless_cancelled(task_id, ai_processor.process_batch(
                             task_id,
                             current_batch,
                             batch_chapters,
                             manga_title
-                        )
+                        ))
+                        if chunk_files is _CANCELLED:
+                            continue  # Drain until the download loop stops
 
                         # Save script
                         script_path = await ai_processor.save_script(
                             task_id,
                             current_batch,
-                            script,
+                            chunk_files,
                             chapter_range
                         )
                         output_files.append(script_path)
@@ -358,22 +628,31 @@ class CrawlerService:
                         logger.error(f"AI processing error for batch {current_batch}: {e}")
                         # Continue with next batch even if one fails
 
-                    # Clear batch for next round
-                    batch_chapters = {}
-                    current_batch += 1
-
-                    # Go back to downloading status if more chapters remain
-                    if i < len(chapters) - 1:
+                    # Back to downloading status if the AI is now waiting on downloads
+                    if not downloads_done and batch_queue.empty():
+                        await progress.flush()
                         await cls.update_task(task_id, {"status": TaskStatus.DOWNLOADING_IMAGES.value})
 
+            downloader = asyncio.create_task(download_loop())
+            try:
+                await ai_loop()
+            except BaseException:
+                downloader.cancel()
+                raise
+            await downloader  # Re-raises a download error
+
+            if await cls._sync_cancelled(task_id):
+                return
+
             # Phase 3: Combine scripts
+            await cls._emit_progress(task_id, "progress_update", "Finalizing script...", 87)
             final_script_path, script_content = await ai_processor.combine_scripts(task_id, manga_title)
             if final_script_path:
                 output_files.append(final_script_path)
 
             # Phase 3.5: Refine script for TTS
             if script_content:
-                if cls.is_cancelled(task_id):
+                if await cls._sync_cancelled(task_id):
                     return
 
                 await cls._emit_progress(
@@ -384,11 +663,15 @@ class CrawlerService:
                     {}
                 )
 
-                script_content = await ai_processor.refine_script(script_content, manga_title)
+                script_content = await cls._unless_cancelled(
+                    task_id, ai_processor.refine_script(script_content, manga_title)
+                )
+                if script_content is _CANCELLED:
+                    return
                 logger.info(f"Script refined, final length: {len(script_content)} characters")
 
             # Phase 4: Generate video
-            if cls.is_cancelled(task_id):
+            if await cls._sync_cancelled(task_id):
                 return
 
             await cls.update_task(task_id, {"status": TaskStatus.GENERATING_VIDEO.value})
@@ -402,14 +685,20 @@ class CrawlerService:
 
             video_file = None
             if script_content:
+                # Encoder progress arrives many times a second; the stored
+                # value is coalesced like the download counters
+                video_updates = _TaskUpdateBuffer(task_id)
+
                 async def video_progress_callback(stage: str, progress: int):
-                    await cls.update_task(task_id, {"video_progress": progress})
+                    video_updates.merge({"video_progress": progress})
+                    await video_updates.maybe_flush()
                     await cls._emit_progress(
                         task_id,
                         "video_progress",
                         f"Video: {stage}",
                         90 + (progress / 100) * 9,
-                        {"stage": stage, "video_progress": progress}
+                        {"stage": stage, "video_progress": progress},
+                        coalesce=True
                     )
 
                 video_file = await video_generator.generate_video(
@@ -418,6 +707,7 @@ class CrawlerService:
                     script_content=script_content,
                     progress_callback=video_progress_callback
                 )
+                await video_updates.flush()
 
                 if video_file:
                     output_files.append(video_file)
@@ -432,7 +722,7 @@ class CrawlerService:
             # Phase 5: Upload to YouTube
             youtube_video_id = None
             if video_file and settings.youtube_enabled:
-                if cls.is_cancelled(task_id):
+                if await cls._sync_cancelled(task_id):
                     return
 
                 await cls._emit_progress(
@@ -477,16 +767,16 @@ class CrawlerService:
                     logger.error(f"YouTube upload error: {e}")
                     # Don't fail the task, just log the error
 
-            # Phase 6: Cleanup images
-            await image_downloader.cleanup_task_images(task_id)
+            # Phase 6: Cleanup images (in the background; nothing below needs them)
+            cls._run_in_background(image_downloader.cleanup_task_images(task_id))
 
             # Phase 7: Cleanup and mark as completed
             youtube_url = f"https://youtube.com/watch?v={youtube_video_id}" if youtube_video_id else None
 
             if youtube_video_id:
                 # Cleanup content and videos folder after successful YouTube upload
-                await cls._cleanup_content(task_id)
-                await cls._cleanup_videos(task_id)
+                cls._run_in_background(cls._cleanup_content(task_id))
+                cls._run_in_background(cls._cleanup_videos(task_id))
 
             # Mark as completed
             await cls.update_task(task_id, {
@@ -494,7 +784,7 @@ class CrawlerService:
                 "output_files": output_files if not youtube_video_id else [],
                 "video_file": video_file if not youtube_video_id else None,
                 "youtube_video_id": youtube_video_id,
-                "completed_at": datetime.utcnow()
+                "completed_at": utc_now()
             })
 
             if youtube_video_id:
@@ -529,7 +819,6 @@ class CrawlerService:
             await cls._emit_progress(task_id, "task_failed", f"Error: {str(e)}", 0)
 
         finally:
-            # Cleanup
-            cls._cancelled_tasks.discard(task_id)
-            await scraper.close()
-            await image_downloader.close()
+            # Cleanup. The scraper and downloader sessions are shared by all
+            # tasks and stay open (pools warm) until app shutdown.
+            cls._cancel_events.pop(task_id, None)
@@ -1,65 +1,164 @@
 # AnCapTruyenLamVideo - Image Downloader Service
 
 import asyncio
-import base64
 import logging
 import os
 import random
 import shutil
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Set
+from urllib.parse import urlsplit
 
-import aiohttp
-import aiofiles
+import httpx
 
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+
+# Saved file extension by URL path extension; anything else is saved as .jpg
+_EXT_MAP = {
+    ".jpg": ".jpg",
+    ".jpeg": ".jpg",
+    ".png": ".png",
+    ".webp": ".webp",
+    ".gif": ".gif",
+}
+
+
+@lru_cache(maxsize=4096)
+def _safe_chapter(chapter_number: str) -> str:
+    """Chapter number as a directory name ("12.5" -> "12_5")."""
+    return chapter_number.replace(".", "_").replace("/", "_")
 
 
 class ImageDownloader:
     """Downloads and stores manga images locally."""
 
+    DOWNLOAD_CHUNK_BYTES = 128 * 1024  # Socket read size while streaming a page
+    DOWNLOAD_FLUSH_BYTES = 1024 * 1024  # Buffered before each write to disk
+
     USER_AGENTS = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
     ]
 
     def __init__(self):
+        # Created with the first chapter directory, not at import
         self.base_path = Path(settings.images_dir)
-        self.base_path.mkdir(parents=True, exist_ok=True)
-        self.session: Optional[aiohttp.ClientSession] = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self.session is None or self.session.closed:
-            connector = aiohttp.TCPConnector(limit=10, ssl=False)
-            timeout = aiohttp.ClientTimeout(total=60)
-            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        # Chapter directories already created (forgotten when a task is cleaned up)
+        self._ensured: Set[Path] = set()
+        self.session: Optional[httpx.AsyncClient] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Local image path -> source URL, for sending URLs to the AI instead of base64
+        self._remote_urls: Dict[str, str] = {}
+        # Image host -> whether it serves images without the manga site's Referer
+        self._hotlink_ok: Dict[str, bool] = {}
+
+    async def _get_session(self) -> httpx.AsyncClient:
+        """
+        Get or create the HTTP client. It is shared by all tasks for the
+        app's lifetime and only rebuilt if closed or left over from another loop.
+        HTTP/2 lets concurrent page fetches from one CDN share a connection
+        (hosts without it fall back to pooled HTTP/1.1 connections).
+        The User-Agent is picked once per session and sent with every request.
+        """
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.is_closed or self._session_loop is not loop:
+            self._session_loop = loop
+            self.session = httpx.AsyncClient(
+                headers={
+                    "User-Agent": random.choice(self.USER_AGENTS),
+                    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+                http2=True,
+                verify=False,
+                follow_redirects=True,
+                timeout=httpx.Timeout(60.0),
+                limits=httpx.Limits(
+                    max_connections=settings.image_download_concurrency * 2,
+                    max_keepalive_connections=settings.image_download_concurrency * 2
+                ),
+            )
         return self.session
 
     async def close(self):
         """Close the session."""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        if self.session and not self.session.is_closed:
+            await self.session.aclose()
 
     def _get_headers(self, referer: str) -> dict:
-        """Get request headers."""
-        return {
-            "User-Agent": random.choice(self.USER_AGENTS),
-            "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": referer,
-            "Connection": "keep-alive",
-        }
-
-    def _get_chapter_path(self, task_id: str, chapter_number: str) -> Path:
-        """Get path for chapter images."""
-        # Sanitize chapter number for filesystem
-        safe_chapter = chapter_number.replace(".", "_").replace("/", "_")
-        path = self.base_path / task_id / safe_chapter
-        path.mkdir(parents=True, exist_ok=True)
+        """Per-request headers (the rest are session defaults)."""
+        return {"Referer": referer}
+
+    async def _allows_hotlinking(self, url: str) -> bool:
+        """
+        Check once per host whether an image URL can be fetched without a
+        Referer, as the AI provider would fetch it. Cached for the app's lifetime.
+        """
+        host = urlsplit(url).netloc
+        allowed = self._hotlink_ok.get(host)
+        if allowed is None:
+            try:
+                session = await self._get_session()
+                headers = {"Range": "bytes=0-0"}
+                # Streamed so a server that ignores Range doesn't send the whole image
+                async with session.stream("GET", url, headers=headers) as response:
+                    allowed = (
+                        response.status_code in (200, 206)
+                        and response.headers.get("content-type", "").startswith("image/")
+                    )
+            except Exception as e:
+                logger.warning(f"Hotlink check for {host} failed: {e}")
+                allowed = False
+            self._hotlink_ok[host] = allowed
+            logger.info(f"Image host {host} {'allows' if allowed else 'blocks'} hotlinking; "
+                        f"{'sending URLs' if allowed else 'inlining images'}")
+        return allowed
+
+    async def _save_body(self, response: httpx.Response, save_path: Path) -> None:
+        """
+        Stream a response body to save_path. Typical pages are written with a
+        single thread hop once complete; larger bodies are flushed in
+        DOWNLOAD_FLUSH_BYTES pieces so they're never held in memory whole.
+        """
+        buf = bytearray()
+        f = None
+        try:
+            async for chunk in response.aiter_bytes(self.DOWNLOAD_CHUNK_BYTES):
+                buf += chunk
+                if len(buf) >= self.DOWNLOAD_FLUSH_BYTES:
+                    if f is None:
+                        f = await asyncio.to_thread(open, save_path, "wb")
+                    await asyncio.to_thread(f.write, buf)
+                    buf = bytearray()
+            if f is None:
+                await asyncio.to_thread(save_path.write_bytes, buf)
+            elif buf:
+                await asyncio.to_thread(f.write, buf)
+        except BaseException:
+            # Don't leave a truncated page behind
+            if f is not None:
+                await asyncio.to_thread(f.close)
+                f = None
+            save_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if f is not None:
+                await asyncio.to_thread(f.close)
+
+    def _resolve_chapter_path(self, task_id: str, chapter_number: str) -> Path:
+        """Get path for chapter images (no filesystem access)."""
+        return self.base_path / task_id / _safe_chapter(chapter_number)
+
+    def _ensure_chapter_path(self, task_id: str, chapter_number: str) -> Path:
+        """Get path for chapter images, creating the directory for downloads."""
+        path = self._resolve_chapter_path(task_id, chapter_number)
+        if path not in self._ensured:
+            path.mkdir(parents=True, exist_ok=True)
+            self._ensured.add(path)
         return path
 
     async def download_image(
@@ -74,20 +173,18 @@ class ImageDownloader:
             session = await self._get_session()
             headers = self._get_headers(referer)
 
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    async with aiofiles.open(save_path, "wb") as f:
-                        await f.write(content)
+            async with session.stream("GET", url, headers=headers) as response:
+                if response.status_code == 200:
+                    await self._save_body(response, save_path)
                     return True
-                elif response.status == 403 or response.status == 429:
+                elif response.status_code == 403 or response.status_code == 429:
                     if retry < 3:
                         await asyncio.sleep(5 * (retry + 1))
                         return await self.download_image(url, save_path, referer, retry + 1)
-                    logger.error(f"Failed to download {url}: HTTP {response.status}")
+                    logger.error(f"Failed to download {url}: HTTP {response.status_code}")
                     return False
                 else:
-                    logger.error(f"Failed to download {url}: HTTP {response.status}")
+                    logger.error(f"Failed to download {url}: HTTP {response.status_code}")
                     return False
         except Exception as e:
             if retry < 3:
@@ -108,102 +205,119 @@ class ImageDownloader:
         Download all images for a chapter.
         Returns list of local file paths.
         """
-        chapter_path = self._get_chapter_path(task_id, chapter_number)
-        downloaded_paths = []
+        chapter_path = self._ensure_chapter_path(task_id, chapter_number)
+        # Pages download concurrently, up to image_download_concurrency at once
+        slots = asyncio.Semaphore(settings.image_download_concurrency)
+        completed = 0
 
-        for i, url in enumerate(image_urls):
-            # Determine file extension
-            ext = ".jpg"
-            if ".png" in url.lower():
-                ext = ".png"
-            elif ".webp" in url.lower():
-                ext = ".webp"
-            elif ".gif" in url.lower():
-                ext = ".gif"
+        async def fetch_one(i: int, url: str) -> Optional[str]:
+            nonlocal completed
+            # Determine file extension from the URL path (not its query string)
+            ext = _EXT_MAP.get(os.path.splitext(urlsplit(url).path)[1].lower(), ".jpg")
 
             filename = f"page_{i+1:04d}{ext}"
             save_path = chapter_path / filename
 
-            # Add small delay between downloads
-            if i > 0:
-                await asyncio.sleep(random.uniform(0.3, 0.8))
-
-            success = await self.download_image(url, save_path, referer)
-            if success:
-                downloaded_paths.append(str(save_path))
-                if progress_callback:
-                    await progress_callback(i + 1, len(image_urls))
+            async with slots:
+                # Small jitter so requests don't leave in lockstep bursts
+                await asyncio.sleep(random.uniform(0, 0.3))
+                success = await self.download_image(url, save_path, referer)
+            if not success:
+                return None
+            self._remote_urls[str(save_path)] = url
+            completed += 1
+            if progress_callback:
+                await progress_callback(completed, len(image_urls))
+            return str(save_path)
+
+        results = await asyncio.gather(
+            *(fetch_one(i, url) for i, url in enumerate(image_urls)),
+            return_exceptions=True
+        )
+        # gather keeps page order
+        downloaded_paths = []
+        for url, result in zip(image_urls, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error downloading {url}: {result}")
+            elif result is not None:
+                downloaded_paths.append(result)
 
         logger.info(f"Downloaded {len(downloaded_paths)}/{len(image_urls)} images for chapter {chapter_number}")
         return downloaded_paths
 
-    async def get_chapter_images_base64(
+    async def get_chapter_images(
         self,
         task_id: str,
         chapter_number: str
     ) -> List[dict]:
         """
-        Load chapter images as base64 for AI processing.
-        Returns list of {path, base64, media_type}.
+        List chapter images for AI processing, in page order.
+        Returns list of {path}; the AI processor reads and encodes each file
+        only when its chunk is sent. When AI_INLINE_IMAGES is off, images with
+        a known source URL on a host that allows hotlinking are returned as
+        {path, remote_url} instead.
         """
-        chapter_path = self._get_chapter_path(task_id, chapter_number)
-        images = []
-
-        if not chapter_path.exists():
-            return images
-
-        # Get sorted list of image files
-        image_files = sorted(
-            [f for f in chapter_path.iterdir() if f.is_file() and f.suffix.lower() in [".jpg", ".jpeg", ".png", ".webp", ".gif"]],
-            key=lambda x: x.name
-        )
-
-        for img_path in image_files:
-            try:
-                async with aiofiles.open(img_path, "rb") as f:
-                    content = await f.read()
-                    b64 = base64.b64encode(content).decode("utf-8")
-
-                    # Determine media type
-                    ext = img_path.suffix.lower()
-                    media_type = {
-                        ".jpg": "image/jpeg",
-                        ".jpeg": "image/jpeg",
-                        ".png": "image/png",
-                        ".webp": "image/webp",
-                        ".gif": "image/gif",
-                    }.get(ext, "image/jpeg")
-
-                    images.append({
-                        "path": str(img_path),
-                        "base64": b64,
-                        "media_type": media_type,
-                    })
-            except Exception as e:
-                logger.error(f"Error reading image {img_path}: {e}")
+        chapter_path = self._resolve_chapter_path(task_id, chapter_number)
 
+        # Get sorted list of image files; scandir entries know their type,
+        # so there's no stat() per file
+        try:
+            with os.scandir(chapter_path) as entries:
+                image_files = [
+                    (entry.name, entry.path) for entry in entries
+                    if entry.is_file(follow_symlinks=False)
+                    and os.path.splitext(entry.name)[1].lower() in _EXT_MAP
+                ]
+        except FileNotFoundError:
+            return []
+        image_files.sort()
+        return await self.image_refs([path for _, path in image_files])
+
+    async def image_refs(self, paths: List[str]) -> List[dict]:
+        """
+        Image references for AI processing from local paths, e.g. the list
+        download_chapter_images just returned (already in page order, so
+        the chapter directory isn't listed again). Same format as
+        get_chapter_images.
+        """
+        images = []
+        for path in paths:
+            remote_url = None if settings.ai_inline_images else self._remote_urls.get(path)
+            if remote_url and await self._allows_hotlinking(remote_url):
+                images.append({"path": path, "remote_url": remote_url})
+            else:
+                images.append({"path": path})
         return images
 
     async def cleanup_task_images(self, task_id: str):
         """Delete downloaded images after processing is complete."""
         task_path = self.base_path / task_id
+        task_prefix = str(task_path) + os.sep
+        for path in [p for p in self._remote_urls if p.startswith(task_prefix)]:
+            del self._remote_urls[path]
+        self._ensured = {p for p in self._ensured if p.parent != task_path}
+
         if task_path.exists():
             try:
-                shutil.rmtree(task_path)
+                # Can be thousands of files; delete them off the event loop
+                await asyncio.to_thread(shutil.rmtree, task_path)
                 logger.info(f"Cleaned up images for task {task_id}")
             except Exception as e:
                 logger.error(f"Error cleaning up task {task_id}: {e}")
 
     def get_task_image_count(self, task_id: str) -> int:
         """Get total number of downloaded images for a task."""
-        task_path = self.base_path / task_id
-        if not task_path.exists():
-            return 0
-
+        # scandir entries carry the file type from the directory listing,
+        # so the is_dir/is_file checks need no stat() per file
         count = 0
-        for chapter_dir in task_path.iterdir():
-            if chapter_dir.is_dir():
-                count += len([f for f in chapter_dir.iterdir() if f.is_file()])
+        try:
+            with os.scandir(self.base_path / task_id) as chapters:
+                for chapter_dir in chapters:
+                    if chapter_dir.is_dir(follow_symlinks=False):
+                        with os.scandir(chapter_dir.path) as files:
+                            count += sum(1 for f in files if f.is_file(follow_symlinks=False))
+        except FileNotFoundError:
+            return 0
         return count
 
 
@@ -3,16 +3,111 @@
 import asyncio
 import random
 import logging
-from typing import List, Dict, Optional
-from urllib.parse import urljoin
+import re
+import time
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
+from typing import List, Dict, Optional, Union
+from urllib.parse import urljoin, urlsplit
 
-import aiohttp
-from bs4 import BeautifulSoup
+import httpx
+from aiolimiter import AsyncLimiter
+from selectolax.lexbor import LexborHTMLParser
 
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Selectors tried in order; the first that matches anything wins
+_CHAPTER_SELECTORS = (
+    "div.list-chapter a",
+    "div.works-chapter-list a",
+    "ul.list-chapter a",
+    ".chapter-list a",
+    "#list-chapter a",
+    ".list_chapter a",
+)
+_IMAGE_SELECTORS = (
+    "div.chapter-content img",
+    "div.page-chapter img",
+    "div.reading-content img",
+    ".chapter-detail img",
+    "#content-chapter img",
+    ".content-chapter img",
+    ".chapter_content img",
+)
+_TITLE_SELECTOR = "h1.ttl-name, h1.story-name, .book-title h1, h1"
+# Fallback filter for manga page images
+_IMAGE_HINTS = ("chapter", "page", "manga", "comic", "img")
+
+# Chapter number from a chapter link's text (hrefs use _chapter_number_from_href)
+_CHAP_NUM_RE = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def _chapter_number_from_href(href: str) -> Optional[str]:
+    """
+    Chapter number after the first "chap" in an href (case-insensitive), e.g.
+    ".../chap-12.5.html" -> "12.5". Same result as searching
+    r"chap[^\d]*(\d+(?:\.\d+)?)" in href.lower(), with plain scans instead of
+    a regex match per link.
+    """
+    # islower() is a C scan; most hrefs are already lowercase and skip the copy
+    s = href if href.islower() else href.lower()
+    i = s.find("chap")
+    if i < 0:
+        return None
+    n = len(s)
+    start = i + 4
+    while start < n and not s[start].isdecimal():
+        start += 1
+    if start == n:
+        return None
+    end = start + 1
+    while end < n and s[end].isdecimal():
+        end += 1
+    # Optional fractional part: "." followed by at least one digit
+    if end + 1 < n and s[end] == "." and s[end + 1].isdecimal():
+        end += 2
+        while end < n and s[end].isdecimal():
+            end += 1
+    return s[start:end]
+
+
+def _origin(url: str) -> str:
+    """scheme://host of a page URL, for resolving root-relative links."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _absolute_url(href: str, origin: str, base: str) -> str:
+    """
+    urljoin(base, href), skipping urljoin's parsing for the common absolute
+    and root-relative links. Anything urljoin would rewrite (dot segments,
+    control characters, protocol-relative or relative links) still goes
+    through it.
+    """
+    if "/." not in href and href.isprintable():
+        if href.startswith(("https://", "http://")):
+            host_start = href.index("://") + 3
+            if host_start < len(href) and href[host_start] not in "/?#":
+                return href
+        if href.startswith("/") and not href.startswith("//"):
+            return origin + href
+    return urljoin(base, href)
 
 
 class MangaScraper:
@@ -25,21 +120,51 @@ class MangaScraper:
         "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     ]
 
+    MAX_CONCURRENT_REQUESTS = 8  # Requests to the site in flight at once
+
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self.session is None or self.session.closed:
-            connector = aiohttp.TCPConnector(limit=5, ssl=False)
-            timeout = aiohttp.ClientTimeout(total=settings.crawler_timeout)
-            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self.session: Optional[httpx.AsyncClient] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Concurrent chapter fetches (across all tasks) share these, so
+        # overlapping them never bursts past the site's limits
+        self._slots = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        # Token bucket per site host, created on first request when
+        # CRAWLER_REQUESTS_PER_MINUTE is set
+        self._rate_limits: Dict[str, AsyncLimiter] = {}
+
+    def _rate_limit(self, url: str) -> Optional[AsyncLimiter]:
+        """The token bucket for url's host, or None when unlimited."""
+        if settings.crawler_requests_per_minute <= 0:
+            return None
+        host = urlsplit(url).netloc
+        limiter = self._rate_limits.get(host)
+        if limiter is None:
+            limiter = self._rate_limits[host] = AsyncLimiter(settings.crawler_requests_per_minute, 60)
+        return limiter
+
+    async def _get_session(self) -> httpx.AsyncClient:
+        """
+        Get or create the HTTP client. It is shared by all tasks for the
+        app's lifetime and only rebuilt if closed or left over from another loop.
+        With HTTP/2, concurrent chapter pages share one multiplexed connection;
+        the per-site cap is enforced by _slots.
+        """
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.is_closed or self._session_loop is not loop:
+            self._session_loop = loop
+            self.session = httpx.AsyncClient(
+                http2=True,
+                verify=False,
+                follow_redirects=True,
+                timeout=httpx.Timeout(settings.crawler_timeout),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            )
         return self.session
 
     async def close(self):
         """Close the session."""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        if self.session and not self.session.is_closed:
+            await self.session.aclose()
 
     def _get_headers(self, referer: str = "https://truyenqqno.com/") -> Dict[str, str]:
         """Get request headers with random user agent."""
@@ -49,35 +174,52 @@ class MangaScraper:
             "Accept-Language": "en-US,en;q=0.9,vi;q=0.8",
             "Accept-Encoding": "gzip, deflate, br",
             "Referer": referer,
-            "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
         }
 
-    async def _make_request(self, url: str, retry: int = 0) -> str:
-        """Make HTTP request with retry logic and anti-scraping measures."""
+    async def _make_request(self, url: str, retry: int = 0) -> Union[bytes, str]:
+        """
+        Make HTTP request with retry logic and anti-scraping measures.
+        Returns the raw (decompressed) body; the parser reads UTF-8 bytes
+        directly, so it isn't decoded to str first. Pages declaring another
+        charset are decoded here, since the parser assumes UTF-8 for bytes.
+        """
         # Add delay between requests
         delay = random.uniform(settings.crawler_delay_min, settings.crawler_delay_max)
         await asyncio.sleep(delay)
 
         session = await self._get_session()
         headers = self._get_headers()
+        rate_limit = self._rate_limit(url)
 
         try:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    return await response.text()
-                elif response.status == 429:  # Rate limited
-                    if retry < settings.crawler_max_retries:
+            async with self._slots:
+                if rate_limit is not None:
+                    await rate_limit.acquire()
+                response = await session.get(url, headers=headers)
+                status = response.status_code
+                if status == 200:
+                    body = response.content
+                    charset = response.charset_encoding
+                    if charset and charset.lower().replace("-", "") != "utf8":
+                        return body.decode(charset, errors="replace")
+                    return body
+            # Retries back off outside the slot so they don't hold up other requests
+            if status == 429:  # Rate limited
+                if retry < settings.crawler_max_retries:
+                    # Wait as long as the site asks, if it says
+                    wait_time = _retry_after(response.headers.get("retry-after"))
+                    if wait_time is None:
                         wait_time = 10 * (retry + 1)
-                        logger.warning(f"Rate limited, waiting {wait_time}s before retry")
-                        await asyncio.sleep(wait_time)
-                        return await self._make_request(url, retry + 1)
-                elif response.status == 403:
-                    logger.error(f"Access forbidden for {url}")
-                    raise Exception(f"Access forbidden (403) for URL: {url}")
-                else:
-                    raise Exception(f"HTTP {response.status} for URL: {url}")
-        except aiohttp.ClientError as e:
+                    logger.warning(f"Rate limited, waiting {wait_time:.0f}s before retry")
+                    await asyncio.sleep(wait_time)
+                    return await self._make_request(url, retry + 1)
+            elif status == 403:
+                logger.error(f"Access forbidden for {url}")
+                raise Exception(f"Access forbidden (403) for URL: {url}")
+            else:
+                raise Exception(f"HTTP {status} for URL: {url}")
+        except httpx.HTTPError as e:
             if retry < settings.crawler_max_retries:
                 wait_time = 5 * (retry + 1)
                 logger.warning(f"Request failed, retrying in {wait_time}s: {e}")
@@ -92,74 +234,73 @@ class MangaScraper:
         """
         logger.info(f"Fetching manga info from: {url}")
         html = await self._make_request(url)
-        soup = BeautifulSoup(html, "lxml")
+        # Parsing a long chapter list takes a while; keep the loop free for
+        # the other tasks' downloads meanwhile
+        return await asyncio.to_thread(self._parse_manga_page, html, url)
+
+    def _parse_manga_page(self, html: Union[bytes, str], url: str) -> Dict:
+        """Extract title and sorted chapter list from a manga page (blocking)."""
+        # Lexbor builds the DOM in C; Python node objects exist only for the
+        # elements the selectors return, so the rest of the page costs no
+        # Python allocations (what a BeautifulSoup SoupStrainer was for)
+        tree = LexborHTMLParser(html)
 
         # Extract manga title
-        title_elem = soup.select_one("h1.ttl-name, h1.story-name, .book-title h1, h1")
-        title = title_elem.get_text(strip=True) if title_elem else "Unknown Manga"
+        title_elem = tree.css_first(_TITLE_SELECTOR)
+        title = title_elem.text(strip=True) if title_elem else "Unknown Manga"
 
         # Extract chapters - truyenqqno.com typically has chapter list in a div
         chapters = []
+        # (chapter number as float, chapter) for sorting; parsed once per chapter
+        keyed = []
 
         # Try different selectors for chapter list
-        chapter_selectors = [
-            "div.list-chapter a",
-            "div.works-chapter-list a",
-            "ul.list-chapter a",
-            ".chapter-list a",
-            "#list-chapter a",
-            ".list_chapter a",
-        ]
-
+        origin = _origin(url)
         chapter_links = []
-        for selector in chapter_selectors:
-            chapter_links = soup.select(selector)
+        for selector in _CHAPTER_SELECTORS:
+            chapter_links = tree.css(selector)
             if chapter_links:
                 logger.info(f"Found chapters using selector: {selector}")
                 break
 
         if not chapter_links:
             # Fallback: find all links that look like chapter links
-            all_links = soup.find_all("a", href=True)
             chapter_links = [
-                link for link in all_links
-                if "chap" in link.get("href", "").lower()
+                link for link in tree.css("a[href]")
+                if "chap" in (link.attributes.get("href") or "").lower()
             ]
 
         for link in chapter_links:
-            href = link.get("href", "")
+            href = link.attributes.get("href") or ""
             if not href:
                 continue
 
             # Make absolute URL
-            chapter_url = urljoin(url, href)
+            chapter_url = _absolute_url(href, origin, url)
 
             # Extract chapter number from URL or text
-            chapter_text = link.get_text(strip=True)
+            chapter_text = link.text(strip=True)
 
             # Try to extract chapter number
-            import re
-            match = re.search(r"chap[^\d]*(\d+(?:\.\d+)?)", href.lower())
-            if match:
-                chapter_number = match.group(1)
-            else:
-                match = re.search(r"(\d+(?:\.\d+)?)", chapter_text)
+            chapter_number = _chapter_number_from_href(href)
+            if chapter_number is None:
+                match = _CHAP_NUM_RE.search(chapter_text)
                 chapter_number = match.group(1) if match else str(len(chapters) + 1)
 
-            chapters.append({
+            chapter = {
                 "chapter_number": chapter_number,
                 "chapter_title": chapter_text or f"Chapter {chapter_number}",
                 "chapter_url": chapter_url,
-            })
-
-        # Sort chapters by number
-        def sort_key(ch):
+            }
+            chapters.append(chapter)
             try:
-                return float(ch["chapter_number"])
+                keyed.append((float(chapter_number), chapter))
             except ValueError:
-                return 0
+                keyed.append((0.0, chapter))
 
-        chapters.sort(key=sort_key)
+        # Sort chapters by number (stable, so equal numbers keep page order)
+        keyed.sort(key=itemgetter(0))
+        chapters = [chapter for _, chapter in keyed]
 
         logger.info(f"Found {len(chapters)} chapters for '{title}'")
 
@@ -175,53 +316,43 @@ class MangaScraper:
         """
         logger.info(f"Fetching images from: {chapter_url}")
         html = await self._make_request(chapter_url)
-        soup = BeautifulSoup(html, "lxml")
+        return await asyncio.to_thread(self._parse_chapter_page, html, chapter_url)
+
+    def _parse_chapter_page(self, html: Union[bytes, str], chapter_url: str) -> List[str]:
+        """Extract unique image URLs, in page order, from a chapter page (blocking)."""
+        tree = LexborHTMLParser(html)
 
         image_urls = []
 
         # Try different selectors for manga images
-        image_selectors = [
-            "div.chapter-content img",
-            "div.page-chapter img",
-            "div.reading-content img",
-            ".chapter-detail img",
-            "#content-chapter img",
-            ".content-chapter img",
-            ".chapter_content img",
-        ]
-
         images = []
-        for selector in image_selectors:
-            images = soup.select(selector)
+        for selector in _IMAGE_SELECTORS:
+            images = tree.css(selector)
             if images:
                 logger.info(f"Found images using selector: {selector}")
                 break
 
         if not images:
             # Fallback: find all images that look like manga pages
-            all_images = soup.find_all("img")
             images = [
-                img for img in all_images
-                if any(x in str(img.get("src", "")).lower() or str(img.get("data-src", "")).lower()
-                       for x in ["chapter", "page", "manga", "comic", "img"])
+                img for img in tree.css("img")
+                if any(x in (img.attributes.get("src") or "").lower() or (img.attributes.get("data-src") or "").lower()
+                       for x in _IMAGE_HINTS)
             ]
 
+        origin = _origin(chapter_url)
         for img in images:
             # Try different attributes for image URL
-            src = img.get("data-src") or img.get("data-original") or img.get("src") or ""
+            attrs = img.attributes
+            src = attrs.get("data-src") or attrs.get("data-original") or attrs.get("src") or ""
 
             if src and not src.startswith("data:"):
                 # Make absolute URL
-                absolute_url = urljoin(chapter_url, src)
+                absolute_url = _absolute_url(src, origin, chapter_url)
                 image_urls.append(absolute_url)
 
         # Remove duplicates while preserving order
-        seen = set()
-        unique_urls = []
-        for url in image_urls:
-            if url not in seen:
-                seen.add(url)
-                unique_urls.append(url)
+        unique_urls = list(dict.fromkeys(image_urls))
 
         logger.info(f"Found {len(unique_urls)} images in chapter")
         return unique_urls
@@ -14,12 +14,17 @@ from telegram.ext import (
     filters,
 )
 
-from ..config import get_settings
+from ..config import settings
 from ..models.crawler import CrawlerTaskCreate
 from .crawler import CrawlerService
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Accepted manga URLs (truyenqq mirrors)
+_VALID_URL_RES = [
+    re.compile(r"https?://truyenqqno\.com/truyen-tranh/.+"),
+    re.compile(r"https?://truyenqq\..+/truyen-tranh/.+"),
+]
 
 
 class TelegramBotService:
@@ -165,17 +170,8 @@ Tiến độ: {task.get('progress', 0)}%
 
     async def _handle_list(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /list command - show all processed manga."""
-        tasks = await CrawlerService.get_all_tasks()
-
-        if not tasks:
-            await update.message.reply_text("Chưa có truyện nào được xử lý.")
-            return
-
-        # Filter only completed tasks with YouTube uploads
-        completed_tasks = [
-            task for task in tasks
-            if task.get("status") == "completed"
-        ]
+        # Only completed tasks are listed; filtered by the (status, created_at) index
+        completed_tasks = await CrawlerService.get_all_tasks(status="completed")
 
         if not completed_tasks:
             await update.message.reply_text("Chưa có truyện nào hoàn thành.")
@@ -358,11 +354,7 @@ Tiến độ: {task.get('progress', 0)}%
 
     def _is_valid_manga_url(self, url: str) -> bool:
         """Check if URL is a valid truyenqq manga URL."""
-        patterns = [
-            r"https?://truyenqqno\.com/truyen-tranh/.+",
-            r"https?://truyenqq\..+/truyen-tranh/.+",
-        ]
-        return any(re.match(pattern, url) for pattern in patterns)
+        return any(pattern.match(url) for pattern in _VALID_URL_RES)
 
 
 # Singleton instance
@@ -1,16 +1,21 @@
 # AnCapTruyenLamVideo - Text-to-Speech Service
 
+import hashlib
 import logging
 import asyncio
+import os
+import shutil
+import time
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import edge_tts
+from mutagen.mp3 import MP3
 
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 
 class TTSService:
@@ -22,9 +27,13 @@ class TTSService:
         "male": "vi-VN-NamMinhNeural",    # Male voice
     }
 
+    SEGMENT_RETRIES = 3  # Extra attempts per narration segment before giving up
+
     def __init__(self):
         self.output_path = Path(settings.content_dir)
         self.default_voice = self.VIETNAMESE_VOICES["male"]
+        self.cache_path = self.output_path / "_tts_cache"
+        self._cache_pruned = False
 
     async def generate_audio(
         self,
@@ -57,7 +66,18 @@ class TTSService:
             # Create output directory if needed
             output_file.parent.mkdir(parents=True, exist_ok=True)
 
-            # Generate speech
+            # Synthesis is deterministic in text + voice settings, so a
+            # retried video reuses the audio of unchanged segments
+            cache_file = None
+            if settings.tts_cache_enabled:
+                cache_file = self.cache_path / f"{self._cache_key(text, voice, rate, volume)}.mp3"
+                if await asyncio.to_thread(self._restore_cache_entry, cache_file, output_file):
+                    logger.info(f"TTS cache hit: {cache_file.name}")
+                    return True
+
+            # Generate speech. Each Communicate opens its own WebSocket: the
+            # service takes one synthesis per connection, so there is nothing
+            # to pool; segments overlap their handshakes by running concurrently
             communicate = edge_tts.Communicate(
                 text=text,
                 voice=voice,
@@ -67,6 +87,8 @@ class TTSService:
 
             await communicate.save(str(output_file))
             logger.info(f"Generated audio: {output_file}")
+            if cache_file is not None:
+                await asyncio.to_thread(self._store_cache_entry, output_file, cache_file)
             return True
 
         except Exception as e:
@@ -91,35 +113,117 @@ class TTSService:
             List of {audio_path: str, duration: float, ...} for each segment
         """
         output_dir.mkdir(parents=True, exist_ok=True)
-        results = []
-
-        for i, segment in enumerate(segments):
+        if settings.tts_cache_enabled and not self._cache_pruned:
+            self._cache_pruned = True
+            await asyncio.to_thread(self._prune_cache)
+        # Synthesis is a network round trip per segment; run up to
+        # tts_concurrency of them at once
+        slots = asyncio.Semaphore(settings.tts_concurrency)
+
+        async def synthesize(i: int, segment: dict) -> Optional[dict]:
             text = segment.get("text", "")
             if not text.strip():
-                continue
+                return None
 
             audio_file = output_dir / f"segment_{i:04d}.mp3"
 
-            success = await self.generate_audio(
-                text=text,
-                output_file=audio_file,
-                voice=voice
-            )
-
-            if success:
-                # Get audio duration using ffprobe
-                duration = await self._get_audio_duration(audio_file)
-                results.append({
-                    **segment,
-                    "audio_path": str(audio_file),
-                    "duration": duration
-                })
-            else:
+            async with slots:
+                # One failed segment fails the whole video, so transient
+                # errors (throttling, dropped sockets) are retried. The backoff
+                # keeps the slot, easing off the service while it struggles.
+                for attempt in range(self.SEGMENT_RETRIES + 1):
+                    success = await self.generate_audio(
+                        text=text,
+                        output_file=audio_file,
+                        voice=voice
+                    )
+                    if success or attempt == self.SEGMENT_RETRIES:
+                        break
+                    wait_time = 2 * (attempt + 1)
+                    logger.warning(f"TTS failed for segment {i}, retrying in {wait_time}s")
+                    await asyncio.sleep(wait_time)
+
+            if not success:
                 logger.warning(f"Failed to generate audio for segment {i}")
+                return None
+
+            return {**segment, "audio_path": str(audio_file)}
 
+        # gather keeps segment order; empty and failed segments are left out
+        results = await asyncio.gather(*(synthesize(i, s) for i, s in enumerate(segments)))
+        results = [r for r in results if r is not None]
+
+        # Durations for all segments at once
+        durations = await self._get_audio_durations([Path(r["audio_path"]) for r in results])
+        for result, duration in zip(results, durations):
+            result["duration"] = duration
         return results
 
-    async def _get_audio_duration(self, audio_file: Path) -> float:
+    @staticmethod
+    def _cache_key(text: str, voice: str, rate: str, volume: str) -> str:
+        """BLAKE2b digest of the text and voice settings of a synthesis."""
+        return hashlib.blake2b(f"{voice}|{rate}|{volume}|{text}".encode(), digest_size=20).hexdigest()
+
+    def _restore_cache_entry(self, cache_file: Path, output_file: Path) -> bool:
+        """Copy cached audio to output_file; False on a miss."""
+        try:
+            shutil.copyfile(cache_file, output_file)
+        except FileNotFoundError:
+            return False
+        # Mark as recently used, so pruning goes by last use
+        os.utime(cache_file)
+        return True
+
+    def _store_cache_entry(self, src: Path, cache_file: Path) -> None:
+        """Copy to a temp file and rename so readers never see a partial entry."""
+        try:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(src, tmp_file)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not cache TTS audio {cache_file.name}: {e}")
+
+    def _prune_cache(self) -> None:
+        """Delete cache entries unused for tts_cache_max_age_days (blocking)."""
+        cutoff = time.time() - settings.tts_cache_max_age_days * 86400
+        removed = 0
+        try:
+            with os.scandir(self.cache_path) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+        except FileNotFoundError:
+            return
+        if removed:
+            logger.info(f"Pruned {removed} expired TTS cache entries")
+
+    async def _get_audio_durations(self, audio_files: List[Path]) -> List[float]:
+        """
+        Get durations of several audio files in seconds. The MP3 headers are
+        read in a single worker-thread pass; ffprobe runs only for files that
+        can't be read that way.
+        """
+        def read_all() -> List[Optional[float]]:
+            durations = []
+            for audio_file in audio_files:
+                try:
+                    durations.append(MP3(str(audio_file)).info.length)
+                except Exception as e:
+                    logger.warning(f"Could not read MP3 duration of {audio_file}, trying ffprobe: {e}")
+                    durations.append(None)
+            return durations
+
+        durations = await asyncio.to_thread(read_all)
+        missing = [i for i, duration in enumerate(durations) if duration is None]
+        if missing:
+            probed = await asyncio.gather(*(self._probe_duration(audio_files[i]) for i in missing))
+            for i, duration in zip(missing, probed):
+                durations[i] = duration
+        return durations
+
+    async def _probe_duration(self, audio_file: Path) -> float:
         """Get duration of audio file in seconds using ffprobe."""
         try:
             cmd = [
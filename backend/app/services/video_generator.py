@@ -2,17 +2,86 @@
 
 import asyncio
 import logging
+import os
 import re
 import shutil
+from itertools import chain
 from pathlib import Path
 from typing import Optional, Callable, List
 from datetime import datetime
 
-from ..config import get_settings
+import xxhash
+from PIL import Image
+
+from ..config import settings
 from .tts_service import tts_service
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Consecutive frames of a page are identical, so scene detection, B-frames
+# and extra reference frames cost analysis time for no size gain
+_X264_SLIDESHOW_PARAMS = "keyint=250:min-keyint=250:scenecut=0:bframes=0:ref=1:rc-lookahead=10"
+
+# Encoder-specific ffmpeg arguments, in auto-detection preference order
+_ENCODER_ARGS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23", "-b:v", "2M", "-pix_fmt", "yuv420p"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "faster", "-global_quality", "23", "-pix_fmt", "nv12"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "55", "-pix_fmt", "yuv420p"],
+    "libx264": [
+        "-c:v", "libx264", "-preset", "faster", "-crf", "23", "-pix_fmt", "yuv420p",
+        "-tune", "stillimage", "-x264-params", _X264_SLIDESHOW_PARAMS,
+    ],
+}
+
+# Longer libx264 slideshows are encoded as up to one chunk per CPU in
+# parallel, then stream-copied together (x264 alone doesn't use every core
+# on still frames). Each chunk gets at least _CHUNK_MIN_IMAGES pages.
+CHUNKED_ENCODE_MIN_IMAGES = 200
+_CHUNK_MIN_IMAGES = 25
+
+# Page cache hints for encoder inputs (posix_fadvise is Linux/Unix only)
+_FADV_WILLNEED = getattr(os, "POSIX_FADV_WILLNEED", None)
+_FADV_DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)
+
+# Seconds allowed for a hardware encoder's test encode before it's skipped
+ENCODER_PROBE_TIMEOUT = 30
+
+# Output frame size; pages are fitted inside it and letterboxed in black
+VIDEO_SIZE = (1280, 720)
+# Same fit/pad as an ffmpeg filter, for frames that weren't prescaled
+_SCALE_PAD_FILTER = "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2"
+
+# Narration cleanup (_clean_script_for_tts)
+_PART_MARKER_RE = re.compile(r"^PHẦN\s*\d+/\d+")
+_CHAPTER_MARKER_RE = re.compile(r"CHƯƠNG\s*(\d+)")
+_SENTENCE_PUNCT_RE = re.compile(r"([.!?]+)")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_SPACES_RE = re.compile(r" {2,}")
+# Lines containing any of these are dropped: metadata headers, then the
+# model's meta/conversation phrases. One alternation scans each line once.
+_SKIP_LINE_RE = re.compile("|".join(map(re.escape, [
+    "Task ID:", "Batch:", "Chapters:", "Generated:", "Total Batches:", "Manga:",
+    "Tất nhiên rồi",
+    "Hãy để tôi",
+    "Tôi sẽ tiếp tục",
+    "Tôi sẽ kể",
+    "Được rồi",
+    "Chắc chắn rồi",
+    "Như bạn yêu cầu",
+    "Theo yêu cầu",
+    "Dưới đây là",
+    "Đây là phần",
+    "Tiếp tục từ",
+    "BẮT ĐẦU VIẾT",
+    "TIẾP TỤC:",
+    "CÂU CHUYỆN:",
+])))
+
+# Filename sanitizing: drop characters invalid on common filesystems, spaces to "_"
+_SANITIZE_TABLE = str.maketrans({**{c: None for c in '<>:"/\\|?*'}, " ": "_"})
+
+# Whitespace after sentence-ending punctuation (where narration is split)
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
 
 
 class VideoGenerator:
@@ -20,9 +89,13 @@ class VideoGenerator:
 
     def __init__(self):
         self.content_path = Path(settings.content_dir)
-        self.images_path = Path(settings.images_dir)
+        # Resolved once, so collected pages and prescaled frames are already
+        # absolute paths for the ffmpeg concat list
+        self.images_path = Path(settings.images_dir).absolute()
         self.videos_path = Path(settings.videos_dir)
-        self.temp_path = Path("temp_video")
+        self.temp_path = Path("temp_video").absolute()
+        # Encoder picked on first use (see _get_encoder)
+        self._encoder: Optional[str] = None
         # Ensure videos directory exists
         self.videos_path.mkdir(parents=True, exist_ok=True)
 
@@ -49,9 +122,8 @@ class VideoGenerator:
         task_output_path = self.videos_path / task_id
         task_temp_path = self.temp_path / task_id
 
-        # Clean up temp directory
-        if task_temp_path.exists():
-            shutil.rmtree(task_temp_path)
+        # Clean up temp directory (in a worker thread; can hold thousands of frames)
+        await asyncio.to_thread(shutil.rmtree, task_temp_path, ignore_errors=True)
         task_temp_path.mkdir(parents=True, exist_ok=True)
 
         try:
@@ -59,7 +131,7 @@ class VideoGenerator:
             if progress_callback:
                 await progress_callback("collecting_images", 5)
 
-            all_images = self._collect_images(task_images_path)
+            all_images = await self._collect_images(task_images_path)
             if not all_images:
                 logger.error("No images found for video generation")
                 return None
@@ -68,6 +140,13 @@ class VideoGenerator:
             if len(all_images) > 100:
                 logger.info(f"Large video: this may take 10-30 minutes to process")
 
+            # Fit every page to the frame size up front, in parallel, so ffmpeg
+            # reads ready-made frames instead of scaling each page serially
+            frames = await self._prescale_images(all_images, task_temp_path / "frames")
+            prescaled = frames is not None
+            if prescaled:
+                all_images = frames
+
             # Step 2: Generate full audio from script
             if progress_callback:
                 await progress_callback("generating_audio", 10)
@@ -76,19 +155,23 @@ class VideoGenerator:
             clean_script = self._clean_script_for_tts(script_content)
             logger.info(f"Cleaned script: {len(clean_script)} characters for TTS")
 
+            # Synthesize the script in segments concurrently, then join them
             audio_file = task_temp_path / "narration.mp3"
-            logger.info("Starting audio generation (this may take a few minutes)...")
-            success = await tts_service.generate_audio(
-                text=clean_script,
-                output_file=audio_file
+            segments = self._split_for_tts(clean_script)
+            logger.info(f"Starting audio generation for {len(segments)} segments...")
+            segment_audio = await tts_service.generate_audio_for_segments(
+                [{"text": text} for text in segments],
+                task_temp_path / "narration"
             )
 
-            if not success:
+            if not segments or len(segment_audio) != len(segments):
                 logger.error("Failed to generate audio")
                 return None
 
-            # Get audio duration
-            audio_duration = await tts_service._get_audio_duration(audio_file)
+            await asyncio.to_thread(
+                self._join_audio, [Path(s["audio_path"]) for s in segment_audio], audio_file
+            )
+            audio_duration = sum(s["duration"] for s in segment_audio)
             logger.info(f"Generated audio: {audio_duration:.2f} seconds")
 
             if progress_callback:
@@ -113,13 +196,50 @@ class VideoGenerator:
             output_video = task_output_path / f"{self._sanitize_filename(manga_title)}_video.mp4"
             output_video.parent.mkdir(parents=True, exist_ok=True)
 
-            success = await self._create_video_with_ffmpeg(
-                image_list_file=image_list_file,
-                audio_file=audio_file,
-                output_file=output_video,
-                total_images=len(all_images),
-                progress_callback=progress_callback
-            )
+            # Start reading the narration into the page cache while ffmpeg
+            # opens its inputs; it is read throughout the encode
+            await asyncio.to_thread(self._advise_cache, [audio_file], _FADV_WILLNEED)
+
+            cpus = os.cpu_count() or 1
+
+            async def encode(encoder: str) -> bool:
+                # Long software encodes run as parallel chunks, falling back
+                # to the single pass if that fails
+                if encoder == "libx264" and len(all_images) > CHUNKED_ENCODE_MIN_IMAGES and cpus > 1:
+                    if await self._create_video_chunked(
+                        images=all_images,
+                        duration=duration_per_image,
+                        audio_file=audio_file,
+                        output_file=output_video,
+                        work_dir=task_temp_path / "chunks",
+                        jobs=cpus,
+                        progress_callback=progress_callback,
+                        prescaled=prescaled
+                    ):
+                        return True
+                    logger.warning("Chunked encoding failed, encoding in a single pass")
+                return await self._create_video_with_ffmpeg(
+                    image_list_file=image_list_file,
+                    audio_file=audio_file,
+                    output_file=output_video,
+                    total_images=len(all_images),
+                    progress_callback=progress_callback,
+                    encoder=encoder,
+                    prescaled=prescaled
+                )
+
+            encoder = await self._get_encoder()
+            success = await encode(encoder)
+            if not success and encoder != "libx264":
+                # The device can still fail after passing the test encode; stay
+                # on software encoding from now on
+                logger.warning(f"Encoding with {encoder} failed, retrying with libx264")
+                self._encoder = "libx264"
+                success = await encode("libx264")
+
+            # Every input was read once; drop it from the page cache rather
+            # than let it push out pages that other work still needs
+            await asyncio.to_thread(self._advise_cache, [audio_file, *all_images], _FADV_DONTNEED)
 
             if success:
                 logger.info(f"Video generated: {output_video}")
@@ -136,31 +256,121 @@ class VideoGenerator:
 
         finally:
             # Clean up temp files
-            if task_temp_path.exists():
-                shutil.rmtree(task_temp_path)
+            await asyncio.to_thread(shutil.rmtree, task_temp_path, ignore_errors=True)
 
-    def _collect_images(self, images_path: Path) -> List[Path]:
-        """Collect all images from chapter directories in order."""
-        if not images_path.exists():
+    async def _collect_images(self, images_path: Path) -> List[Path]:
+        """
+        Collect all images from chapter directories in order. Chapter
+        directories are listed concurrently in worker threads; scandir
+        entries carry their file type, so there's no stat() per file.
+        """
+        try:
+            with os.scandir(images_path) as entries:
+                chapter_dirs = [
+                    (entry.name, entry.path) for entry in entries
+                    if entry.is_dir(follow_symlinks=False)
+                ]
+        except FileNotFoundError:
             return []
 
-        all_images = []
-
         # Get chapter directories sorted by chapter number
-        chapter_dirs = sorted(
-            [d for d in images_path.iterdir() if d.is_dir()],
-            key=lambda x: self._parse_chapter_number(x.name)
-        )
+        chapter_dirs.sort(key=lambda d: self._parse_chapter_number(d[0]))
+
+        chapters = await asyncio.gather(*(
+            asyncio.to_thread(self._scan_chapter, path) for _, path in chapter_dirs
+        ))
+        return [Path(image) for chapter_images in chapters for image in chapter_images]
+
+    def _scan_chapter(self, chapter_dir: str) -> List[str]:
+        """Image file paths of one chapter directory, sorted by name (blocking)."""
+        with os.scandir(chapter_dir) as entries:
+            images = [
+                (entry.name, entry.path) for entry in entries
+                if entry.is_file(follow_symlinks=False)
+                and entry.name.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+            ]
+        images.sort()
+        return [path for _, path in images]
+
+    def _split_for_tts(self, text: str) -> List[str]:
+        """Split narration at sentence ends into ~tts_segment_chars segments."""
+        segments = []
+        current: List[str] = []
+        length = 0
+        for sentence in _SENTENCE_BREAK_RE.split(text):
+            if current and length + len(sentence) > settings.tts_segment_chars:
+                segments.append(" ".join(current))
+                current, length = [], 0
+            current.append(sentence)
+            length += len(sentence) + 1
+        if current:
+            segments.append(" ".join(current))
+        return [s for s in segments if s.strip()]
+
+    def _join_audio(self, parts: List[Path], output_file: Path) -> None:
+        """
+        Concatenate segment MP3s into one file (blocking). Edge TTS returns
+        bare MP3 frames in a single format, so the bytes join cleanly.
+        """
+        with open(output_file, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
 
-        for chapter_dir in chapter_dirs:
-            # Get images in this chapter, sorted by name
-            chapter_images = sorted(
-                [f for f in chapter_dir.iterdir() if f.is_file() and f.suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']],
-                key=lambda x: x.name
-            )
-            all_images.extend(chapter_images)
+    async def _prescale_images(self, images: List[Path], output_dir: Path) -> Optional[List[Path]]:
+        """
+        Write each page fitted and padded to VIDEO_SIZE into output_dir, using
+        a worker thread per CPU (Pillow releases the GIL while decoding and
+        resizing). Returns the new paths in order, or None if any page
+        failed, in which case ffmpeg scales the originals itself.
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        slots = asyncio.Semaphore(os.cpu_count() or 4)
 
-        return all_images
+        async def prescale(i: int, image: Path) -> Path:
+            frame = output_dir / f"frame_{i:05d}.jpg"
+            async with slots:
+                await asyncio.to_thread(self._prescale_image, image, frame)
+            return frame
+
+        try:
+            return await asyncio.gather(*(prescale(i, image) for i, image in enumerate(images)))
+        except Exception as e:
+            logger.warning(f"Prescaling images failed, letting ffmpeg scale them: {e}")
+            return None
+
+    def _prescale_image(self, source: Path, target: Path) -> None:
+        """Fit one page inside VIDEO_SIZE on a black frame (blocking)."""
+        width, height = VIDEO_SIZE
+        with Image.open(source) as img:
+            # JPEGs can decode straight at a reduced scale close to the target
+            img.draft("RGB", VIDEO_SIZE)
+            img = img.convert("RGB")
+            scale = min(width / img.width, height / img.height)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if size != img.size:
+                # reducing_gap box-shrinks large (non-JPEG) pages by an integer
+                # factor first, so the bicubic pass works on far fewer pixels
+                img = img.resize(size, Image.Resampling.BICUBIC, reducing_gap=3.0)
+            frame = Image.new("RGB", VIDEO_SIZE)
+            frame.paste(img, ((width - size[0]) // 2, (height - size[1]) // 2))
+        frame.save(target, "JPEG", quality=95)
+
+    def _advise_cache(self, paths: List[Path], advice: Optional[int]) -> None:
+        """posix_fadvise each file (blocking; a no-op where unsupported)."""
+        if advice is None:
+            return
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, 0, 0, advice)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
 
     def _parse_chapter_number(self, name: str) -> float:
         """Parse chapter number from directory name."""
@@ -176,24 +386,6 @@ class VideoGenerator:
         lines = script.split("\n")
         clean_lines = []
 
-        # Phrases to skip (meta/conversation phrases)
-        skip_phrases = [
-            "Tất nhiên rồi",
-            "Hãy để tôi",
-            "Tôi sẽ tiếp tục",
-            "Tôi sẽ kể",
-            "Được rồi",
-            "Chắc chắn rồi",
-            "Như bạn yêu cầu",
-            "Theo yêu cầu",
-            "Dưới đây là",
-            "Đây là phần",
-            "Tiếp tục từ",
-            "BẮT ĐẦU VIẾT",
-            "TIẾP TỤC:",
-            "CÂU CHUYỆN:",
-        ]
-
         for line in lines:
             stripped = line.strip()
 
@@ -202,7 +394,7 @@ class VideoGenerator:
                 continue
 
             # Skip part markers like "PHẦN 3/45"
-            if re.match(r"^PHẦN\s*\d+/\d+", stripped):
+            if _PART_MARKER_RE.match(stripped):
                 continue
 
             # Skip empty lines at the start
@@ -210,16 +402,13 @@ class VideoGenerator:
                 continue
 
             # Skip metadata lines (fallback, should not appear in clean script)
-            if any(x in line for x in ["Task ID:", "Batch:", "Chapters:", "Generated:", "Total Batches:", "Manga:"]):
-                continue
-
-            # Skip meta/conversation phrases
-            if any(phrase in stripped for phrase in skip_phrases):
+            # and meta/conversation phrases
+            if _SKIP_LINE_RE.search(stripped):
                 continue
 
             # Skip chapter markers but add natural chapter reference
             if stripped.startswith("CHƯƠNG") or stripped.startswith("--- CHƯƠNG"):
-                match = re.search(r"CHƯƠNG\s*(\d+)", stripped)
+                match = _CHAPTER_MARKER_RE.search(stripped)
                 if match:
                     clean_lines.append(f"Chương {match.group(1)}.")
                 continue
@@ -229,31 +418,35 @@ class VideoGenerator:
         # Join lines
         text = "\n".join(clean_lines)
 
-        # Remove duplicate sentences (track all seen, not just consecutive)
-        sentences = re.split(r'([.!?]+)', text)
+        # Remove duplicate sentences (track all seen, not just consecutive).
+        # Sentences are sliced between punctuation matches as they're found
+        # (the None sentinel yields the trailing text). Seen sentences are
+        # kept as 64-bit xxh3 ints rather than normalized copies.
         seen_sentences = set()
         cleaned_sentences = []
+        xxh3 = xxhash.xxh3_64_intdigest
+        prev_end = 0
 
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i].strip()
-            punct = sentences[i + 1] if i + 1 < len(sentences) else ""
-
+        for match in chain(_SENTENCE_PUNCT_RE.finditer(text), (None,)):
+            if match is None:
+                sentence, punct = text[prev_end:], ""
+            else:
+                sentence, punct = text[prev_end:match.start()], match.group()
+                prev_end = match.end()
+            sentence = sentence.strip()
             if sentence:
-                # Normalize for comparison
-                normalized = re.sub(r'\s+', ' ', sentence.lower().strip())
+                # Normalize for comparison (lowercase, whitespace collapsed)
+                digest = xxh3(" ".join(sentence.lower().split()).encode())
 
-                if normalized not in seen_sentences:
-                    seen_sentences.add(normalized)
+                if digest not in seen_sentences:
+                    seen_sentences.add(digest)
                     cleaned_sentences.append(sentence + punct)
 
-            i += 2 if punct else 1
-
         text = " ".join(cleaned_sentences)
 
         # Clean up whitespace
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        text = re.sub(r" {2,}", " ", text)
+        text = _BLANK_LINES_RE.sub("\n\n", text)
+        text = _SPACES_RE.sub(" ", text)
 
         return text.strip()
 
@@ -263,18 +456,76 @@ class VideoGenerator:
         output_file: Path,
         duration: float
     ):
-        """Create ffmpeg concat demuxer input file."""
-        with open(output_file, "w") as f:
-            for img in images:
-                # Escape single quotes in path
-                escaped_path = str(img.absolute()).replace("'", "'\\''")
-                f.write(f"file '{escaped_path}'\n")
-                f.write(f"duration {duration}\n")
-
-            # Add last image again (required by concat demuxer)
-            if images:
-                escaped_path = str(images[-1].absolute()).replace("'", "'\\''")
-                f.write(f"file '{escaped_path}'\n")
+        """
+        Create ffmpeg concat demuxer input file (built in memory, written once).
+        Image paths are absolute (under images_path or temp_path).
+        """
+        entries = []
+        for img in images:
+            # Escape single quotes in path
+            escaped_path = str(img).replace("'", "'\\''")
+            entries.append(f"file '{escaped_path}'\nduration {duration}\n")
+
+        # Add last image again (required by concat demuxer)
+        if images:
+            entries.append(f"file '{escaped_path}'\n")
+
+        output_file.write_bytes("".join(entries).encode("utf-8"))
+
+    async def _get_encoder(self) -> str:
+        """
+        H.264 encoder to use: VIDEO_ENCODER if set, else the first hardware
+        encoder listed by `ffmpeg -encoders` that can encode a test frame
+        (checked once per process).
+        """
+        if self._encoder is None:
+            if settings.video_encoder != "auto":
+                self._encoder = settings.video_encoder
+            else:
+                self._encoder = "libx264"
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        "ffmpeg", "-hide_banner", "-encoders",
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                    stdout, _ = await proc.communicate()
+                    available = {
+                        fields[1] for fields in (line.split() for line in stdout.decode(errors="replace").splitlines())
+                        if len(fields) > 1
+                    }
+                    # Stock ffmpeg builds list nvenc/qsv even without the
+                    # hardware, so each candidate must encode a frame first
+                    for name in _ENCODER_ARGS:
+                        if name == "libx264" or name not in available:
+                            continue
+                        if await self._encoder_works(name):
+                            self._encoder = name
+                            break
+                        logger.info(f"Video encoder {name} is listed but unusable here")
+                except Exception as e:
+                    logger.warning(f"Could not list ffmpeg encoders, using libx264: {e}")
+            logger.info(f"Video encoder: {self._encoder}")
+        return self._encoder
+
+    async def _encoder_works(self, encoder: str) -> bool:
+        """Whether ffmpeg can encode one small test frame with encoder."""
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", "nullsrc=s=256x256",
+            "-frames:v", "1",
+            *_ENCODER_ARGS[encoder],
+            "-f", "null", "-",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            # Device initialisation can hang on broken drivers
+            return await asyncio.wait_for(proc.wait(), timeout=ENCODER_PROBE_TIMEOUT) == 0
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False
 
     async def _create_video_with_ffmpeg(
         self,
@@ -282,26 +533,31 @@ class VideoGenerator:
         audio_file: Path,
         output_file: Path,
         total_images: int = 0,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        encoder: str = "libx264",
+        prescaled: bool = False
     ) -> bool:
-        """Create video using ffmpeg with progress streaming."""
+        """
+        Create video using ffmpeg with progress streaming. Prescaled frames
+        are already VIDEO_SIZE, so they skip the scale/pad filter.
+        """
         try:
             # Build ffmpeg command with progress output
             cmd = [
                 "ffmpeg",
                 "-y",  # Overwrite output
                 "-progress", "pipe:1",  # Output progress to stdout
+                # stderr then carries only real errors, not the banner and
+                # a stats line per frame update
+                "-nostats", "-loglevel", "error",
                 "-f", "concat",
                 "-safe", "0",
                 "-i", str(image_list_file),
                 "-i", str(audio_file),
-                "-c:v", "libx264",
-                "-preset", "fast",  # Use fast preset for quicker encoding
-                "-crf", "23",
+                *_ENCODER_ARGS.get(encoder, ["-c:v", encoder, "-pix_fmt", "yuv420p"]),
                 "-c:a", "aac",
                 "-b:a", "192k",
-                "-pix_fmt", "yuv420p",
-                "-vf", "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
+                *(() if prescaled else ("-vf", _SCALE_PAD_FILTER)),
                 "-shortest",
                 "-movflags", "+faststart",
                 str(output_file)
@@ -322,36 +578,37 @@ class VideoGenerator:
 
             async def read_progress():
                 nonlocal last_progress_log, frame_count
-                while True:
-                    line = await proc.stdout.readline()
-                    if not line:
-                        break
-                    line_str = line.decode().strip()
-                    if line_str.startswith("frame="):
-                        try:
-                            frame_count = int(line_str.split("=")[1])
-                            # Log progress every 100 frames
-                            if frame_count - last_progress_log >= 100:
-                                if total_images > 0:
-                                    pct = min(99, int((frame_count / total_images) * 100))
-                                    logger.info(f"Video encoding: {frame_count}/{total_images} frames ({pct}%)")
-                                    if progress_callback:
-                                        await progress_callback("encoding_video", 50 + int(pct * 0.45))
-                                else:
-                                    logger.info(f"Video encoding: {frame_count} frames processed")
-                                last_progress_log = frame_count
-                        except (ValueError, IndexError):
-                            pass
-
-            # Read stderr for errors
+                # Read in blocks and only look at the latest complete
+                # "frame=" line; earlier ones in the block are stale
+                pending = b""
+                while chunk := await proc.stdout.read(4096):
+                    pending += chunk
+                    end = pending.rfind(b"\n")
+                    if end < 0:
+                        continue
+                    complete, pending = b"\n" + pending[:end + 1], pending[end + 1:]
+                    start = complete.rfind(b"\nframe=")
+                    if start < 0:
+                        continue
+                    try:
+                        frame_count = int(complete[start + 7:complete.index(b"\n", start + 1)])
+                    except ValueError:
+                        continue
+                    # Log progress every 100 frames
+                    if frame_count - last_progress_log >= 100:
+                        if total_images > 0:
+                            pct = min(99, int((frame_count / total_images) * 100))
+                            logger.info(f"Video encoding: {frame_count}/{total_images} frames ({pct}%)")
+                            if progress_callback:
+                                await progress_callback("encoding_video", 50 + int(pct * 0.45))
+                        else:
+                            logger.info(f"Video encoding: {frame_count} frames processed")
+                        last_progress_log = frame_count
+
+            # Read stderr for errors (in one call, concurrently so the pipe
+            # never fills and stalls ffmpeg); empty on success
             async def read_stderr():
-                stderr_data = []
-                while True:
-                    line = await proc.stderr.readline()
-                    if not line:
-                        break
-                    stderr_data.append(line.decode())
-                return "".join(stderr_data)
+                return (await proc.stderr.read()).decode(errors="replace")
 
             # Run both readers concurrently
             _, stderr_output = await asyncio.gather(
@@ -372,12 +629,110 @@ class VideoGenerator:
             logger.error(f"ffmpeg execution error: {e}")
             return False
 
+    async def _create_video_chunked(
+        self,
+        images: List[Path],
+        duration: float,
+        audio_file: Path,
+        output_file: Path,
+        work_dir: Path,
+        jobs: int,
+        progress_callback: Optional[Callable] = None,
+        prescaled: bool = False
+    ) -> bool:
+        """
+        Encode consecutive runs of pages to MPEG-TS chunks with libx264 in
+        parallel (video only), then concatenate them with a stream copy and
+        mux the narration in a final pass.
+        """
+        count = max(1, min(jobs, len(images) // _CHUNK_MIN_IMAGES))
+        per_chunk = -(-len(images) // count)  # ceil
+        chunks = [images[i:i + per_chunk] for i in range(0, len(images), per_chunk)]
+        # Split the CPUs between the encoders instead of each auto-sizing to all of them
+        threads = str(max(1, jobs // len(chunks)))
+        work_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Encoding {len(images)} images as {len(chunks)} parallel chunks...")
+
+        done = 0
+
+        async def encode_chunk(i: int, chunk: List[Path]) -> bool:
+            nonlocal done
+            list_file = work_dir / f"chunk_{i:03d}.txt"
+            await self._create_image_list(chunk, list_file, duration)
+            ok = await self._run_ffmpeg([
+                "ffmpeg", "-y", "-nostats", "-loglevel", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", str(list_file),
+                *_ENCODER_ARGS["libx264"],
+                "-threads", threads,
+                *(() if prescaled else ("-vf", _SCALE_PAD_FILTER)),
+                # The repeated last page the concat list needs would otherwise
+                # add a frame to every chunk and drift the audio. The final
+                # chunk keeps it, as in the single pass, so the last page
+                # lasts its full duration and -shortest doesn't cut the
+                # narration's end.
+                *(() if i == len(chunks) - 1 else ("-t", f"{len(chunk) * duration:.3f}")),
+                "-an",
+                "-f", "mpegts",
+                str(work_dir / f"chunk_{i:03d}.ts")
+            ])
+            if ok:
+                done += 1
+                if progress_callback:
+                    await progress_callback("encoding_video", 50 + int(done / len(chunks) * 45))
+            return ok
+
+        results = await asyncio.gather(*(encode_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        if not all(results):
+            return False
+
+        chunks_file = work_dir / "chunks.txt"
+        # MPEG-TS doesn't record how long a chunk's last frame lasts, so each
+        # chunk's length is given explicitly; otherwise every join would start
+        # the next chunk early and the pages would drift from the narration
+        entries = []
+        for i, chunk in enumerate(chunks):
+            escaped_path = str(work_dir / f"chunk_{i:03d}.ts").replace("'", "'\\''")
+            entries.append(f"file '{escaped_path}'\nduration {len(chunk) * duration:.3f}\n")
+        chunks_file.write_bytes("".join(entries).encode("utf-8"))
+        ok = await self._run_ffmpeg([
+            "ffmpeg", "-y", "-nostats", "-loglevel", "error",
+            "-f", "concat", "-safe", "0",
+            "-i", str(chunks_file),
+            "-i", str(audio_file),
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-shortest",
+            "-movflags", "+faststart",
+            str(output_file)
+        ])
+        if ok:
+            logger.info(f"Video encoding complete: {len(chunks)} chunks joined")
+        return ok
+
+    async def _run_ffmpeg(self, cmd: List[str]) -> bool:
+        """Run an ffmpeg command to completion; logs stderr on failure."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await proc.communicate()
+        except Exception as e:
+            logger.error(f"ffmpeg execution error: {e}")
+            return False
+        if proc.returncode != 0:
+            logger.error(f"ffmpeg error: {stderr.decode(errors='replace')}")
+            return False
+        return True
+
     def _sanitize_filename(self, name: str) -> str:
         """Sanitize filename for filesystem."""
-        # Remove or replace invalid characters
-        name = re.sub(r'[<>:"/\\|?*]', '', name)
-        name = name.replace(' ', '_')
-        return name[:100]  # Limit length
+        # Remove or replace invalid characters in one pass
+        return name.translate(_SANITIZE_TABLE)[:100]  # Limit length
 
 
 # Singleton instance
@@ -4,24 +4,39 @@ import asyncio
 import logging
 import os
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow, Flow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
-from ..config import get_settings
+from ..config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 # YouTube API scopes
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 
+# Resumable upload chunk size; larger chunks mean far fewer round-trips
+# (Google recommends at least 8MB for throughput), must be a multiple of 256KB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_NUM_RETRIES = 5  # Per-chunk retries on 5xx / connection errors
+UPLOAD_HTTP_TIMEOUT = 300  # Seconds per API request (an 8MB chunk on a slow link)
+
+
+@lru_cache(maxsize=1)
+def _youtube_discovery_doc() -> Optional[str]:
+    """YouTube v3 discovery document bundled with google-api-python-client, read once."""
+    return get_static_doc("youtube", "v3")
+
 
 class YouTubeUploader:
     """Service for uploading videos to YouTube."""
@@ -169,7 +184,17 @@ class YouTubeUploader:
             raise Exception("Not authenticated. Run authenticate_interactive() first.")
 
         if not self.youtube:
-            self.youtube = build("youtube", "v3", credentials=self.credentials)
+            # build() takes either credentials or http, so the timeout-carrying
+            # transport is wrapped with the credentials here
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=UPLOAD_HTTP_TIMEOUT))
+            doc = _youtube_discovery_doc()
+            if doc is not None:
+                # No discovery fetch and the document is only read from disk once
+                self.youtube = build_from_document(doc, http=http)
+            else:
+                # The file discovery cache doesn't work with oauth2client >= 4 and
+                # only logs a warning on every build
+                self.youtube = build("youtube", "v3", http=http, cache_discovery=False)
 
         return self.youtube
 
@@ -252,7 +277,7 @@ class YouTubeUploader:
                 video_path,
                 mimetype="video/mp4",
                 resumable=True,
-                chunksize=1024 * 1024  # 1MB chunks
+                chunksize=UPLOAD_CHUNK_SIZE
             )
 
             request = youtube.videos().insert(
@@ -262,11 +287,15 @@ class YouTubeUploader:
             )
 
             response = None
+            last_progress = 0
             while response is None:
-                status, response = request.next_chunk()
+                status, response = request.next_chunk(num_retries=UPLOAD_NUM_RETRIES)
                 if status:
                     progress = int(status.progress() * 100)
-                    logger.info(f"YouTube upload progress: {progress}%")
+                    # Log every 5% step rather than every chunk
+                    if progress // 5 != last_progress // 5:
+                        logger.info(f"YouTube upload progress: {progress}%")
+                    last_progress = progress
 
             video_id = response.get("id")
             logger.info(f"YouTube upload complete: https://youtube.com/watch?v={video_id}")
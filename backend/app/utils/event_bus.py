@@ -1,8 +1,7 @@
 # AnCapTruyenLamVideo - Event Bus for SSE Broadcasting
 
 import asyncio
-from typing import Dict, Set
-from collections import defaultdict
+from typing import Dict, Tuple
 import logging
 
 from ..models.crawler import ProgressEvent
@@ -13,42 +12,74 @@ logger = logging.getLogger(__name__)
 class EventBus:
     """Manages SSE connections and event broadcasting."""
 
-    _instance = None
+    # Events buffered per subscriber; a slow client loses its oldest
+    # (stale) progress events instead of growing without bound
+    QUEUE_SIZE = 128
+    # Coalesced events are held this long (seconds); only the latest is sent
+    COALESCE_WINDOW = 0.2
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
-        return cls._instance
+    def __init__(self):
+        # Task id -> subscriber queues. Tuples are replaced, never
+        # mutated, so publish can iterate one while clients come and go
+        self.subscribers: Dict[str, Tuple[asyncio.Queue, ...]] = {}
+        # Task id -> latest coalesced event not yet delivered
+        self._pending: Dict[str, ProgressEvent] = {}
 
     async def subscribe(self, task_id: str) -> asyncio.Queue:
         """Subscribe to events for a specific task."""
-        queue = asyncio.Queue()
-        self.subscribers[task_id].add(queue)
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self.subscribers[task_id] = self.subscribers.get(task_id, ()) + (queue,)
         logger.info(f"New subscriber for task {task_id}. Total: {len(self.subscribers[task_id])}")
         return queue
 
     def unsubscribe(self, task_id: str, queue: asyncio.Queue):
         """Unsubscribe from task events."""
-        self.subscribers[task_id].discard(queue)
-        logger.info(f"Unsubscribed from task {task_id}. Remaining: {len(self.subscribers[task_id])}")
-        if not self.subscribers[task_id]:
-            del self.subscribers[task_id]
-
-    async def publish(self, task_id: str, event: ProgressEvent):
-        """Publish event to all subscribers of a task."""
-        if task_id not in self.subscribers:
+        remaining = tuple(q for q in self.subscribers.get(task_id, ()) if q is not queue)
+        logger.info(f"Unsubscribed from task {task_id}. Remaining: {len(remaining)}")
+        if remaining:
+            self.subscribers[task_id] = remaining
+        else:
+            self.subscribers.pop(task_id, None)
+
+    def publish(self, task_id: str, event: ProgressEvent, coalesce: bool = False):
+        """
+        Publish event to all subscribers of a task without waiting on any of
+        them. A full queue drops its oldest event to make room.
+        With coalesce, the event is held for COALESCE_WINDOW and replaced by
+        any newer coalesced event in the meantime (for high-frequency
+        progress); a regular event delivers the held one first, keeping order.
+        """
+        if coalesce:
+            if task_id not in self.subscribers:
+                return
+            if task_id not in self._pending:
+                asyncio.get_running_loop().call_later(
+                    self.COALESCE_WINDOW, self._flush_pending, task_id
+                )
+            self._pending[task_id] = event
             return
+        if task_id in self._pending:
+            self._flush_pending(task_id)
+        self._deliver(task_id, event)
+
+    def _flush_pending(self, task_id: str):
+        """Deliver the held coalesced event for a task, if any."""
+        event = self._pending.pop(task_id, None)
+        if event is not None:
+            self._deliver(task_id, event)
 
-        for queue in list(self.subscribers[task_id]):
+    def _deliver(self, task_id: str, event: ProgressEvent):
+        """Put event on every subscriber queue, dropping the oldest if full."""
+        for queue in self.subscribers.get(task_id, ()):
             try:
-                await queue.put(event)
-            except Exception as e:
-                logger.error(f"Error publishing event: {e}")
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(event)
 
     def get_subscriber_count(self, task_id: str) -> int:
         """Get number of subscribers for a task."""
-        return len(self.subscribers.get(task_id, set()))
+        return len(self.subscribers.get(task_id, ()))
 
 
 # Singleton instance